@@ -0,0 +1,40 @@
+# This source code is a part of Attend. Attend is a voice assistant that uses 
+# very expensive algorithms to direct your attention... however you damn well please.
+# Copyright (C) 2025 Scott Macdonell
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Sample format conversion for recorded audio.
+"""
+
+import numpy as np
+
+# int16 full scale, so converted samples fall in [-1.0, 1.0)
+_S16_SCALE = np.float32(1.0 / 32768.0)
+
+def s16_to_f32_norm(data, out: np.ndarray) -> np.ndarray:
+    """
+    Convert raw little-endian int16 PCM into normalized float32 samples.
+
+    The samples are written into out, which must be a float32 array with
+    room for them, and the filled part of out is returned. The cast and
+    multiply are done by a single NumPy ufunc call, whose inner loops are
+    already vectorized for SSE2/AVX2/NEON where the CPU supports them.
+    """
+    samples = np.frombuffer(data, dtype=np.int16)
+    dst = out[:samples.size]
+    np.multiply(samples, _S16_SCALE, out=dst, dtype=np.float32)
+    return dst
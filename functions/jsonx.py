@@ -0,0 +1,48 @@
+# This source code is a part of Attend. Attend is a voice assistant that uses 
+# very expensive algorithms to direct your attention... however you damn well please.
+# Copyright (C) 2025 Scott Macdonell
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+JSON helpers backed by orjson when it is installed, falling back to the
+standard library otherwise. dumps() always produces compact output.
+"""
+
+try:
+    import orjson
+
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def dumps(obj) -> str:
+        """Serialize obj to a compact JSON string."""
+        return orjson.dumps(obj).decode()
+
+    def loads(data):
+        """Parse a JSON str or bytes."""
+        return orjson.loads(data)
+
+except ImportError:
+    import json
+
+    JSONDecodeError = json.JSONDecodeError
+
+    def dumps(obj) -> str:
+        """Serialize obj to a compact JSON string."""
+        return json.dumps(obj, separators=(',', ':'))
+
+    def loads(data):
+        """Parse a JSON str or bytes."""
+        return json.loads(data)
@@ -16,91 +16,787 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+import os
+import re
 import time
-import yaml
-import openai
-import nltk
-import json
+import hashlib
+import functools
 import threading
 import queue
-import io
-import pyaudio
-from typing import Optional, Generator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Generator, Iterable
 
-# Download required NLTK data
-nltk.download('punkt', quiet=True)
+# TTS servers return 16-bit mono PCM at 24kHz
+TTS_SAMPLE_RATE = 24000
 
-def load_tts_config():
-    """Load TTS configuration from attend_config.yaml"""
-    with open("attend_config.yaml", "r") as config_file:
-        config = yaml.safe_load(config_file)
+# Defaults for client.tts.chunk_size / client.tts.preroll_bytes in attend_config.yaml.
+# 4096 bytes is ~85ms of audio; 12288 bytes of pre-roll is ~250ms, enough to ride
+# out network jitter without PortAudio underruns.
+TTS_CHUNK_SIZE = 4096
+TTS_PREROLL_BYTES = 12288
+
+# Seconds of audio the network producer may run ahead of playback
+TTS_QUEUE_SECONDS = 0.5
+
+# Sentences of one utterance synthesized concurrently by the sentence pipeline
+TTS_SENTENCE_WORKERS = 3
+
+# Seconds to wait for the next bytes of a TTS response before giving up on
+# the server. Generous, as a healthy server never pauses this long mid-stream
+TTS_READ_TIMEOUT = 30.0
+
+# Directory holding synthesized PCM for fixed phrases such as mode greetings
+TTS_CACHE_DIR = "cache"
+
+# Sentence boundary: terminal punctuation, optionally followed by closing
+# quotes or brackets, then whitespace (group 1)
+_SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]*(\s+)')
+# Characters a sentence end can start with, up to its whitespace
+_SENTENCE_END_CHARS = '.!?"\')]'
+# Abbreviations whose period doesn't end a sentence, matched against the word
+# right before a period
+_ABBREVIATION_RE = re.compile(
+    r'(?<![^\s(\["\'])(?:mrs?|ms|dr|prof|sr|jr|st|vs|etc|e\.g|i\.e|a\.m|p\.m)$',
+    re.IGNORECASE)
+
+# Opening quote of the assistant_response string in a streamed JSON response
+_ASSISTANT_KEY_RE = re.compile(r'"assistant_response"\s*:\s*"')
+_ASSISTANT_KEY = '"assistant_response"'
+# Characters that end a run of plain text inside a JSON string
+_JSON_STRING_SPECIAL_RE = re.compile(r'["\\]')
+# Single-character JSON escapes; any other escaped character stands for itself
+_JSON_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+
+# OpenAI client shared across stream_text calls so its connection pool stays warm
+_client = None
+_client_lock = threading.Lock()
+
+# Workers for the sentence pipeline; threads are only started on first use
+_sentence_executor = ThreadPoolExecutor(max_workers=TTS_SENTENCE_WORKERS, thread_name_prefix="tts-sentence")
+
+# Cache paths being synthesized by prefetch_text_cached, mapped to an Event set when done
+_prefetching = {}
+_prefetching_lock = threading.Lock()
+
+@dataclass(slots=True, frozen=True)
+class TTSConfig:
+    """TTS settings from attend_config.yaml, resolved once by load_tts_config."""
+    api_key: str
+    api_base: str
+    model: str
+    default_voice: str
+    default_speed: float
+    intersentence_pause: float
+    silence: bytes
+    chunk_size: int
+    preroll_bytes: int
+
+@functools.lru_cache(maxsize=1)
+def load_tts_config() -> TTSConfig:
+    """
+    Load TTS configuration from attend_config.yaml (parsed once per process).
+
+    The same TTSConfig is returned to every caller, so it is frozen; tests
+    that patch the config file call load_tts_config.cache_clear() first.
+    """
+    import yaml
+
+    # libyaml's C loader when PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open("attend_config.yaml", "rb") as config_file:
+        config = yaml.load(config_file, Loader=loader)
     
     tts_config = config["server-tts"]
-    return {
-        'api_key': tts_config["key"],
-        'api_base': f"{tts_config['host']}:{tts_config['port']}/v1",
-        'model': tts_config["model"],
-        'default_voice': tts_config["voice"],
-        'default_speed': tts_config["speed"],
-        'intersentence_pause': config["client"]["tts"]["intersentence_pause"]
-    }
+    intersentence_pause = config["client"]["tts"]["intersentence_pause"]
+    return TTSConfig(
+        api_key=tts_config["key"],
+        api_base=f"{tts_config['host']}:{tts_config['port']}/v1",
+        model=tts_config["model"],
+        default_voice=tts_config["voice"],
+        default_speed=tts_config["speed"],
+        intersentence_pause=intersentence_pause,
+        # Zero-filled 16-bit PCM played between sentences, so the output stream
+        # never runs dry during the pause
+        silence=bytes(int(TTS_SAMPLE_RATE * intersentence_pause) * 2),
+        chunk_size=config["client"]["tts"].get("chunk_size", TTS_CHUNK_SIZE),
+        preroll_bytes=config["client"]["tts"].get("preroll_bytes", TTS_PREROLL_BYTES)
+    )
 
-def stream_text(text: str, audio_manager, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None) -> dict:
+def get_tts_client():
+    """Return the shared OpenAI client for the TTS server, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # Imported here so importing this module stays cheap at startup
+                import httpx
+                import openai
+
+                config = load_tts_config()
+                _client = openai.OpenAI(
+                    api_key=config.api_key,
+                    base_url=config.api_base,
+                    # Fail fast on connect, and give up on a stalled response
+                    # instead of blocking the producer and its caller forever
+                    http_client=httpx.Client(
+                        http2=True,
+                        timeout=httpx.Timeout(5.0, read=TTS_READ_TIMEOUT),
+                        limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=300),
+                    ),
+                )
+    return _client
+
+def warm_tts_client():
+    """
+    Open the TTS server connection ahead of the first utterance.
+
+    Issues a tiny speech request and discards the audio, so the TCP/TLS/HTTP2
+    handshake is already done when the user's first turn is spoken. Failures
+    are reported and otherwise ignored; the real request will surface them.
+    """
+    config = load_tts_config()
+    try:
+        with get_tts_client().audio.speech.with_streaming_response.create(
+            model=config.model,
+            voice=config.default_voice,
+            response_format="pcm",
+            input=".",
+        ) as response:
+            for _ in response.iter_bytes():
+                pass
+    except Exception as e:
+        print(f"TTS warm-up failed: {str(e)}")
+
+class _ChunkQueue:
+    """
+    Bounded single-producer/single-consumer queue of PCM chunks.
+
+    deque append and popleft are atomic, so a put or get that doesn't have
+    to wait takes no lock; the condition is only used while one side is
+    blocked on a full or empty queue. A side counts itself in _waiting
+    before it checks the queue under the lock, so the other side's notify
+    can't be missed.
+    """
+    __slots__ = ('_items', '_maxsize', '_cond', '_waiting')
+
+    def __init__(self, maxsize: int):
+        self._items = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._waiting = 0
+
+    def _wait(self, ready, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            self._waiting += 1
+            try:
+                return self._cond.wait_for(ready, timeout)
+            finally:
+                self._waiting -= 1
+
+    def _notify(self):
+        if self._waiting:
+            with self._cond:
+                self._cond.notify_all()
+
+    def put(self, item):
+        """Add an item, blocking while the queue is full."""
+        items = self._items
+        if len(items) >= self._maxsize:
+            self._wait(lambda: len(items) < self._maxsize)
+        items.append(item)
+        self._notify()
+
+    def get(self, timeout: Optional[float] = None):
+        """Remove and return the oldest item; raises queue.Empty on timeout."""
+        items = self._items
+        if not items and not self._wait(items.__len__, timeout):
+            raise queue.Empty
+        item = items.popleft()
+        self._notify()
+        return item
+
+def _audio_queue(config) -> _ChunkQueue:
+    """Create a bounded queue holding roughly TTS_QUEUE_SECONDS of PCM chunks."""
+    max_chunks = int(TTS_SAMPLE_RATE * 2 * TTS_QUEUE_SECONDS) // config.chunk_size
+    return _ChunkQueue(max(2, max_chunks))
+
+def _start_producer(produce, audio_queue: _ChunkQueue) -> threading.Thread:
+    """
+    Run produce() on a daemon thread. Any exception it raises is forwarded onto
+    the queue, followed by a None sentinel marking the end of the audio.
+    """
+    def run():
+        try:
+            produce()
+        except Exception as e:
+            audio_queue.put(e)
+        finally:
+            audio_queue.put(None)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    return worker
+
+def _stop_producer(worker: threading.Thread, audio_queue: _ChunkQueue, stop: threading.Event):
+    """Signal the producer to stop and drain the queue so it can't block on a full put."""
+    stop.set()
+    while worker.is_alive():
+        try:
+            audio_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    worker.join()
+
+def _play_queue(audio_queue: _ChunkQueue, player_stream, config, timing: dict, start_time: float):
+    """
+    Write PCM from the queue to the output stream until the end sentinel,
+    coalescing small network chunks into writes of at least chunk_size bytes.
+    """
+    # Stream activity is checked once when the stream is opened; a stream that
+    # goes inactive later surfaces as a write error.
+    write = player_stream.write
+    # Small chunks waiting to be written together. The list is reused for the
+    # whole utterance and joined once per write, so each chunk is copied at
+    # most once before it reaches PortAudio.
+    parts = []
+    pending = 0
+    chunk_size = config.chunk_size
+    # Buffer the first few hundred ms before starting playback
+    threshold = config.preroll_bytes
+    try:
+        while (chunk := audio_queue.get()) is not None:
+            if isinstance(chunk, Exception):
+                raise chunk
+            if 'time_to_first_byte' not in timing:
+                timing['time_to_first_byte'] = int((time.time() - start_time) * 1000)
+            # Network chunks arrive in arbitrary sizes. Large, frame-aligned ones
+            # go straight to PortAudio; the rest are coalesced so every write
+            # holds whole 16-bit samples.
+            if not parts and len(chunk) >= threshold and not len(chunk) & 1:
+                write(chunk)
+            else:
+                parts.append(chunk)
+                pending += len(chunk)
+                if pending < threshold:
+                    continue
+                data = b''.join(parts)
+                parts.clear()
+                pending = len(data) & 1
+                if pending:
+                    # Carry the odd trailing byte into the next write
+                    parts.append(data[-1:])
+                    data = data[:-1]
+                write(data)
+            threshold = chunk_size
+        if parts:
+            write(b''.join(parts))
+    except OSError as e:
+        raise RuntimeError("Audio output stream became inactive") from e
+
+def stream_text(text: str, audio_manager, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None, capture: Optional[bytearray] = None, client=None) -> dict:
     """
     Stream text-to-speech audio directly to speakers.
+
+    PCM is pulled from the TTS response on a producer thread into a bounded
+    queue and written to the speakers from the calling thread, so network
+    stalls and PortAudio writes don't block each other.
     
     Args:
         text (str): The text to convert to speech
         audio_manager: AudioDeviceManager instance for audio output
         voice (str, optional): The voice to use. Defaults to config value.
         speed (float, optional): The speed of the speech. Defaults to config value.
+        capture (bytearray, optional): If given, receives a copy of all PCM played.
+        client (OpenAI, optional): TTS client to use. Defaults to the shared client.
     
     Returns:
         dict: Timing information including time to first byte and total duration
     """
-    # Validate output stream
-    if not audio_manager.output_stream:
-        raise ValueError("AudioDeviceManager must have an initialized output stream")
-        
     # Load configuration
     config = load_tts_config()
     
-    # Initialize OpenAI client
-    client = openai.OpenAI(
-        api_key=config['api_key'],
-        base_url=config['api_base'],
-    )
+    # Reuse the caller's client, or the shared one
+    client = client or get_tts_client()
     
-    # Get output stream from audio manager
+    # The output stream is validated once by AudioDeviceManager.initialize_streams
     player_stream = audio_manager.output_stream
-    if not player_stream.is_active():
-        raise RuntimeError("Audio output stream is not active")
+
+    audio_queue = _audio_queue(config)
+    stop = threading.Event()
+
+    def produce():
+        with client.audio.speech.with_streaming_response.create(
+            model=model or config.model,
+            voice=voice or config.default_voice,
+            speed=speed or config.default_speed,
+            response_format="pcm",
+            input=text,
+        ) as response:
+            for chunk in response.iter_bytes():
+                if stop.is_set():
+                    return
+                if capture is not None:
+                    capture.extend(chunk)
+                audio_queue.put(chunk)
     
     timing = {}
     start_time = time.time()
+    worker = _start_producer(produce, audio_queue)
     
     try:
-        with client.audio.speech.with_streaming_response.create(
-            model=model or config['model'],
-            voice=voice or config['default_voice'],
-            speed=speed or config['default_speed'],
-            response_format="pcm",
-            input=text,
-        ) as response:
-            # Record time to first byte
-            timing['time_to_first_byte'] = int((time.time() - start_time) * 1000)
-            
-            # Stream audio chunks
-            for chunk in response.iter_bytes(chunk_size=1024):
-                if not player_stream.is_active():
-                    raise RuntimeError("Audio output stream became inactive")
-                player_stream.write(chunk)
+        _play_queue(audio_queue, player_stream, config, timing, start_time)
             
-            # Record total duration
-            timing['total_duration'] = int((time.time() - start_time) * 1000)
+        # Record total duration
+        timing['total_duration'] = int((time.time() - start_time) * 1000)
     
     except Exception as e:
         print(f"Error in TTS streaming: {str(e)}")
         raise
+    finally:
+        _stop_producer(worker, audio_queue, stop)
     
-    return timing
\ No newline at end of file
+    return timing
+
+def _cache_path(text: str, model: str, voice: str, speed: float) -> str:
+    """Cache file for a phrase; any change to text, model, voice or speed changes the name."""
+    key = hashlib.sha1(f"{model}\0{voice}\0{speed}\0{text}".encode('utf-8')).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"greeting_{key}.pcm")
+
+def _write_cache(path: str, pcm):
+    """Save PCM to the cache, reporting rather than raising on failure."""
+    try:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        # Write then rename so a crash never leaves a truncated cache file
+        with open(path + ".tmp", "wb") as cache_file:
+            cache_file.write(pcm)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Could not cache TTS audio: {str(e)}")
+
+def prefetch_text_cached(text: str, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None):
+    """
+    Synthesize fixed text into the on-disk cache without playing it.
+
+    Meant to run on a background thread at startup, so the greeting is ready
+    by the time stream_text_cached plays it. Does nothing if the audio is
+    already cached.
+
+    Args:
+        text (str): The text to convert to speech
+        model (str, optional): The TTS model to use. Defaults to config value.
+        voice (str, optional): The voice to use. Defaults to config value.
+        speed (float, optional): The speed of the speech. Defaults to config value.
+    """
+    config = load_tts_config()
+    model = model or config.model
+    voice = voice or config.default_voice
+    speed = speed or config.default_speed
+    path = _cache_path(text, model, voice, speed)
+    if os.path.exists(path):
+        return
+
+    with _prefetching_lock:
+        if path in _prefetching:
+            return
+        done = _prefetching[path] = threading.Event()
+
+    try:
+        pcm = bytearray()
+        with get_tts_client().audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            speed=speed,
+            response_format="pcm",
+            input=text,
+        ) as response:
+            for chunk in response.iter_bytes():
+                pcm.extend(chunk)
+        _write_cache(path, pcm)
+    except Exception as e:
+        print(f"TTS prefetch failed: {str(e)}")
+    finally:
+        with _prefetching_lock:
+            del _prefetching[path]
+        done.set()
+
+def stream_text_cached(text: str, audio_manager, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None, client=None) -> dict:
+    """
+    Play fixed text, such as a mode greeting, from an on-disk PCM cache.
+
+    The first call streams from the TTS server like stream_text and saves the
+    audio under TTS_CACHE_DIR; later calls play the saved audio without a
+    network request. If prefetch_text_cached is still synthesizing the same
+    text, this waits for it rather than issuing a second request.
+
+    Args:
+        text (str): The text to convert to speech
+        audio_manager: AudioDeviceManager instance for audio output
+        model (str, optional): The TTS model to use. Defaults to config value.
+        voice (str, optional): The voice to use. Defaults to config value.
+        speed (float, optional): The speed of the speech. Defaults to config value.
+        client (OpenAI, optional): TTS client to use. Defaults to the shared client.
+
+    Returns:
+        dict: Timing information including time to first byte and total duration
+    """
+    config = load_tts_config()
+    model = model or config.model
+    voice = voice or config.default_voice
+    speed = speed or config.default_speed
+    path = _cache_path(text, model, voice, speed)
+
+    with _prefetching_lock:
+        prefetch = _prefetching.get(path)
+    if prefetch is not None:
+        prefetch.wait()
+
+    try:
+        with open(path, "rb") as cache_file:
+            pcm = cache_file.read()
+    except FileNotFoundError:
+        capture = bytearray()
+        timing = stream_text(text, audio_manager, model, voice, speed, capture=capture, client=client)
+        _write_cache(path, capture)
+        return timing
+
+    player_stream = audio_manager.output_stream
+
+    start_time = time.time()
+    try:
+        player_stream.write(pcm)
+    except OSError as e:
+        raise RuntimeError("Audio output stream became inactive") from e
+    return {
+        'time_to_first_byte': 0,
+        'total_duration': int((time.time() - start_time) * 1000)
+    }
+
+def find_sentence_ends(text: str, pos: int = 0) -> Generator[tuple, None, None]:
+    """
+    Yield (end, next_start) for each sentence boundary in text, where text
+    starts at the beginning of a sentence and pos is where to start looking.
+
+    A sentence ends at terminal punctuation, optionally followed by closing
+    quotes or brackets, then whitespace. A period after an abbreviation such
+    as "Dr." doesn't end one, so the title isn't spoken as a sentence of its
+    own.
+    """
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text, pos):
+        stop = match.start()
+        if text[stop] == '.' and _ABBREVIATION_RE.search(text, max(start, stop - 4), stop):
+            continue
+        start = match.end()
+        yield match.start(1), start
+
+def split_sentences(text: str) -> list:
+    """
+    Split text into sentences, keeping any closing quotes or brackets with
+    their sentence. See find_sentence_ends for where sentences end.
+    """
+    sentences = []
+    start = 0
+    for end, next_start in find_sentence_ends(text):
+        sentences.append(text[start:end].strip())
+        start = next_start
+    if sentence := text[start:].strip():
+        sentences.append(sentence)
+    return sentences
+
+def _stream_sentences(sentences, audio_manager, model: Optional[str], voice: Optional[str], speed: Optional[float], client=None) -> dict:
+    """
+    Synthesize and play an iterable of sentences.
+
+    A reader thread consumes the iterable and starts TTS for each sentence
+    on a shared pool, so up to TTS_SENTENCE_WORKERS sentences are
+    synthesized at once. Each sentence's PCM collects in its own queue; a
+    relay thread forwards those queues into the playback queue in sentence
+    order. The sentence being played still streams chunk by chunk, so the
+    first sentence starts as soon as its first chunk arrives, and the ones
+    after it are usually ready by the time it ends. The iterable may be
+    lazy; it is only advanced on the reader thread.
+    """
+    config = load_tts_config()
+    client = client or get_tts_client()
+
+    player_stream = audio_manager.output_stream
+
+    pause = config.silence
+    audio_queue = _audio_queue(config)
+    stop = threading.Event()
+
+    # One queue of PCM chunks per sentence, in sentence order, ending with None.
+    # An exception from the iterable is passed along in place of a queue.
+    sentence_queues = queue.SimpleQueue()
+
+    def synthesize(sentence: str, out: queue.SimpleQueue):
+        """Request TTS for one sentence, passing its PCM chunks to out as they arrive."""
+        try:
+            if stop.is_set():
+                return
+            with client.audio.speech.with_streaming_response.create(
+                model=model or config.model,
+                voice=voice or config.default_voice,
+                speed=speed or config.default_speed,
+                response_format="pcm",
+                input=sentence,
+            ) as response:
+                for chunk in response.iter_bytes():
+                    if stop.is_set():
+                        return
+                    out.put(chunk)
+        except Exception as e:
+            out.put(e)
+        finally:
+            out.put(None)
+
+    def read_sentences():
+        """Start synthesis for each sentence as soon as the iterable yields it."""
+        try:
+            for sentence in sentences:
+                if stop.is_set():
+                    return
+                out = queue.SimpleQueue()
+                _sentence_executor.submit(synthesize, sentence, out)
+                sentence_queues.put(out)
+        except Exception as e:
+            sentence_queues.put(e)
+        finally:
+            sentence_queues.put(None)
+
+    def relay():
+        """Forward each sentence's PCM onto the playback queue, in order."""
+        first = True
+        while not stop.is_set() and (chunks := sentence_queues.get()) is not None:
+            if isinstance(chunks, Exception):
+                raise chunks
+            if not first:
+                audio_queue.put(pause)
+            first = False
+            while True:
+                try:
+                    chunk = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    # A stalled sentence request must not keep the relay from
+                    # seeing stop, or _stop_producer would wait on it forever
+                    if stop.is_set():
+                        return
+                    continue
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if stop.is_set():
+                    return
+                audio_queue.put(chunk)
+
+    timing = {}
+    start_time = time.time()
+    threading.Thread(target=read_sentences, daemon=True).start()
+    worker = _start_producer(relay, audio_queue)
+
+    try:
+        _play_queue(audio_queue, player_stream, config, timing, start_time)
+
+        timing['total_duration'] = int((time.time() - start_time) * 1000)
+
+    except Exception as e:
+        print(f"Error in TTS streaming: {str(e)}")
+        raise
+    finally:
+        # Don't leave the relay waiting on a reader still blocked in the iterable
+        sentence_queues.put(None)
+        _stop_producer(worker, audio_queue, stop)
+
+    return timing
+
+def _iter_sentences(text_iter: Iterable[str]) -> Generator[str, None, None]:
+    """Yield complete sentences from a stream of text deltas as soon as each one ends."""
+    buffer = ''
+    for delta in text_iter:
+        # The buffer has already been scanned; only a terminator at its very
+        # end can be completed by whitespace in the new delta
+        pos = len(buffer.rstrip(_SENTENCE_END_CHARS))
+        buffer += delta
+        start = 0
+        for end, next_start in find_sentence_ends(buffer, pos):
+            yield buffer[start:end].strip()
+            start = next_start
+        # What's left may be an unfinished sentence; keep it for the next delta
+        buffer = buffer[start:]
+    if buffer := buffer.strip():
+        yield buffer
+
+def _hex4(text: str, pos: int) -> int:
+    """Parse the four hex digits of a \\u escape, or U+FFFD if they're malformed."""
+    try:
+        return int(text[pos:pos + 4], 16)
+    except ValueError:
+        return 0xFFFD
+
+class AssistantResponseExtractor:
+    """
+    Incrementally pull the assistant_response string out of a streamed JSON
+    response without parsing the JSON.
+
+    feed() takes each delta and returns only the newly decoded text of the
+    string, so it can go straight to sentence splitting. Escapes split across
+    deltas are held back until they are complete.
+    """
+    __slots__ = ('started', 'ended', '_window', '_pending')
+
+    def __init__(self):
+        self.started = False
+        self.ended = False
+        # Tail of the response that may still complete the key
+        self._window = ""
+        # Start of an escape sequence cut off at the end of the last delta
+        self._pending = ""
+
+    def feed(self, delta: str) -> str:
+        """Add a delta of the response and return the string text it adds."""
+        if self.ended:
+            return ""
+        if not self.started:
+            window = self._window + delta
+            match = _ASSISTANT_KEY_RE.search(window)
+            if not match:
+                # Only text from the last key on can still become a match
+                start = window.rfind(_ASSISTANT_KEY)
+                self._window = window[start:] if start != -1 else window[-(len(_ASSISTANT_KEY) - 1):]
+                return ""
+            self.started = True
+            self._window = ""
+            delta = window[match.end():]
+        return self.decode(delta)
+
+    def decode(self, content: str) -> str:
+        """
+        Decode the next piece of an already opened JSON string, stopping at
+        the closing quote.
+        """
+        if self._pending:
+            content = self._pending + content
+            self._pending = ""
+        out = []
+        pos = 0
+        end = len(content)
+        while (match := _JSON_STRING_SPECIAL_RE.search(content, pos)):
+            i = match.start()
+            out.append(content[pos:i])
+            if content[i] == '"':
+                self.ended = True
+                return "".join(out)
+            # Backslash: wait for the rest of the escape if it was cut off
+            if i + 1 == end:
+                self._pending = content[i:]
+                return "".join(out)
+            char = content[i + 1]
+            if char != 'u':
+                out.append(_JSON_ESCAPES.get(char, char))
+                pos = i + 2
+                continue
+            if i + 6 > end:
+                self._pending = content[i:]
+                return "".join(out)
+            code = _hex4(content, i + 2)
+            pos = i + 6
+            if 0xD800 <= code < 0xDC00:
+                # A high surrogate should be followed by the \u escape of the
+                # low half; wait for it if it may still be on its way
+                rest = content[pos:pos + 6]
+                if len(rest) < 6 and '\\u'.startswith(rest[:2]):
+                    self._pending = content[i:]
+                    return "".join(out)
+                low = _hex4(content, pos + 2) if rest.startswith('\\u') else 0
+                if 0xDC00 <= low < 0xE000:
+                    code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                    pos += 6
+            if 0xD800 <= code < 0xE000:
+                # Unpaired surrogates can't be encoded for the TTS request
+                code = 0xFFFD
+            out.append(chr(code))
+        out.append(content[pos:])
+        return "".join(out)
+
+def stream_text_segmented(text: str, audio_manager, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None) -> dict:
+    """
+    Stream text-to-speech audio sentence by sentence.
+
+    Each sentence is synthesized separately, so playback of the first sentence
+    starts as soon as its first chunk arrives while later sentences are still
+    being synthesized.
+
+    Args:
+        text (str): The text to convert to speech
+        audio_manager: AudioDeviceManager instance for audio output
+        model (str, optional): The TTS model to use. Defaults to config value.
+        voice (str, optional): The voice to use. Defaults to config value.
+        speed (float, optional): The speed of the speech. Defaults to config value.
+
+    Returns:
+        dict: Timing information including time to first byte and total duration
+    """
+    return _stream_sentences(split_sentences(text), audio_manager, model, voice, speed)
+
+def stream_text_stream(text_iter: Iterable[str], audio_manager, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None) -> dict:
+    """
+    Stream text-to-speech audio for text that is still being generated.
+
+    Consumes an iterator of text deltas (e.g. from a streaming LLM response)
+    and sends each sentence to TTS as soon as it is complete, so speech starts
+    after the first sentence rather than after the whole response.
+
+    Args:
+        text_iter (Iterable[str]): Text deltas to speak, in order
+        audio_manager: AudioDeviceManager instance for audio output
+        model (str, optional): The TTS model to use. Defaults to config value.
+        voice (str, optional): The voice to use. Defaults to config value.
+        speed (float, optional): The speed of the speech. Defaults to config value.
+
+    Returns:
+        dict: Timing information including time to first byte and total duration
+    """
+    return _stream_sentences(_iter_sentences(text_iter), audio_manager, model, voice, speed)
+
+def stream_streaming_text(response, audio_manager, model: Optional[str] = None, voice: Optional[str] = None, speed: Optional[float] = None, client=None) -> dict:
+    """
+    Stream text-to-speech audio for the assistant_response of a streamed chat
+    completion.
+
+    The response's deltas go through an AssistantResponseExtractor, so each
+    sentence of the assistant's text is sent to TTS as soon as it is complete
+    without re-parsing the JSON received so far. TTS errors are reported and
+    end playback early rather than propagating.
+
+    Args:
+        response: Streamed chat completion (an iterable of chunks)
+        audio_manager: AudioDeviceManager instance for audio output
+        model (str, optional): The TTS model to use. Defaults to config value.
+        voice (str, optional): The voice to use. Defaults to config value.
+        speed (float, optional): The speed of the speech. Defaults to config value.
+        client (OpenAI, optional): TTS client to use. Defaults to the shared client.
+
+    Returns:
+        dict: Timing information including time to first byte and total duration
+    """
+    extractor = AssistantResponseExtractor()
+
+    def text_iter():
+        for chunk in response:
+            content = chunk.choices[0].delta.content
+            if content and (text := extractor.feed(content)):
+                yield text
+            if extractor.ended:
+                return
+
+    timing = {'time_to_first_byte': None}
+    start_time = time.time()
+    try:
+        timing.update(_stream_sentences(_iter_sentences(text_iter()), audio_manager, model, voice, speed, client))
+    except Exception:
+        # Already reported by _stream_sentences
+        timing['total_duration'] = int((time.time() - start_time) * 1000)
+    return timing
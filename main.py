@@ -18,10 +18,13 @@
 import os
 import sys
 import argparse
+import signal
+import threading
 from services.audio_device_manager import AudioDeviceManager
 from services.manage_recording import AudioRecordingService
 from services.interaction.service import InteractionService
 import modes.discuss_activities as initial_mode
+from functions.streamtts import warm_tts_client, prefetch_text_cached
 
 def main():
     parser = argparse.ArgumentParser(description='Attend - Your AI Assistant')
@@ -36,6 +39,18 @@ def main():
         sys.exit(1)
 
     try:
+        # Open the TTS connection and synthesize the greeting while audio
+        # devices and models load
+        threading.Thread(target=warm_tts_client, daemon=True).start()
+        greeting = (initial_mode.SPEC.initialize or {}).get("greeting")
+        if greeting:
+            threading.Thread(
+                target=prefetch_text_cached,
+                args=(greeting["text"],),
+                kwargs={"speed": greeting["speed"]},
+                daemon=True
+            ).start()
+
         # Initialize audio device manager with config
         audio_manager = AudioDeviceManager(config_path=args.config, debug=args.debug)
         
@@ -78,9 +93,11 @@ def main():
 
             print("Attend is running. Press Ctrl+C to exit.")
             
-            # Keep main thread alive
-            while True:
-                input()
+            # Keep main thread alive until Ctrl+C without waking it in between
+            stop_event = threading.Event()
+            signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+            stop_event.wait()
+            print("\nShutting down...")
 
         except KeyboardInterrupt:
             print("\nShutting down...")
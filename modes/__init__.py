@@ -0,0 +1,60 @@
+# This source code is a part of Attend. Attend is a voice assistant that uses 
+# very expensive algorithms to direct your attention... however you damn well please.
+# Copyright (C) 2025 Scott Macdonell
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(slots=True, frozen=True)
+class ModeSpec:
+    """
+    The attributes of a mode module that InteractionManager reads, gathered
+    into one object so a mode switch doesn't repeat module attribute lookups.
+    """
+    name: str
+    schema: dict
+    system_prompt: str
+    switch_to: tuple = ()
+    before_first_turn: Optional[Callable] = None
+    after_attend_turn: Optional[Callable] = None
+    after_user_turn: Optional[Callable] = None
+    initialize: Optional[dict] = None
+
+
+def mode_spec(module) -> ModeSpec:
+    """
+    Return the ModeSpec for a mode module.
+
+    Static modes define SPEC at import time. Modes whose prompt depends on
+    state set at runtime (e.g. perform_activity's activity_description) don't,
+    so their spec is built from the module's current attributes.
+    """
+    spec = getattr(module, 'SPEC', None)
+    if isinstance(spec, ModeSpec):
+        return spec
+
+    switch_to = getattr(module, 'switch_to', ())
+    return ModeSpec(
+        name=getattr(module, 'mode_name', getattr(module, '__name__', '')),
+        schema=getattr(module, 'schema', None),
+        system_prompt=getattr(module, 'system_prompt', None),
+        switch_to=tuple(switch_to) if isinstance(switch_to, (list, tuple)) else (),
+        before_first_turn=getattr(module, 'before_first_turn', None),
+        after_attend_turn=getattr(module, 'after_attend_turn', None),
+        after_user_turn=getattr(module, 'after_user_turn', None),
+        initialize=getattr(module, 'initialize', None),
+    )
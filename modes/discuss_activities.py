@@ -17,7 +17,7 @@
 
 
 
-import json
+from modes import ModeSpec
 
 mode_name = "discuss_activities"
 
@@ -154,3 +154,15 @@ initialize = {
 # Define how to enter each next_mode that is available
     # What should the conversation history be?
     # what else should be passed to the next mode
+
+# Everything InteractionManager reads from this mode, resolved once at import
+SPEC = ModeSpec(
+    name=mode_name,
+    schema=schema,
+    system_prompt=system_prompt,
+    switch_to=tuple(switch_to),
+    before_first_turn=before_first_turn,
+    after_attend_turn=after_attend_turn,
+    after_user_turn=after_user_turn,
+    initialize=initialize,
+)
@@ -1,12 +1,17 @@
-import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+from functions import jsonx
 import time
 import threading
-import pyautogui
-from openai import OpenAI
+import mss
+import numpy as np
+from openai import AsyncOpenAI, APITimeoutError
 from PIL import Image
 import io
 import base64
 import yaml
+import httpx
 from functions.streamtts import stream_text
 
 mode_name = "perform_activity"
@@ -53,14 +58,14 @@ monitor_schema = {
 }
 
 # System prompt for activity monitoring decisions
-monitor_system_prompt = """You are a helpful assistant for a user who said they want to perform a specific activity. Decide if they need help staying on track based on the report of what they are doing on their screen.
+monitor_system_prompt = """You are a helpful assistant for a user who said they want to perform a specific activity. Look at the screenshot of their screen, work out what they are doing, and decide if they need help staying on track.
 
 Your response must follow this JSON schema:
 {
     "outputs": {
         "should_intervene": boolean,  // Required: true if user needs help getting back on track, false if they appear to be engaged in their chosen activity
 
-        "intervention_message": string  // Only include if should_intervene is true: a **short** message comparing their current activity to their desired activity and offering to help them get back on track.
+        "intervention_message": string  // Only include if should_intervene is true: a **short** message, in English, comparing their current activity to their desired activity and offering to help them get back on track.
     }
 }
 
@@ -91,142 +96,304 @@ conversation_schema = {
 # System prompt for regular conversation responses
 schema = conversation_schema
 
+# Defaults for client.vision in attend_config.yaml. Screenshots are downscaled
+# and JPEG-encoded before being sent to the vision LLM; a full-resolution PNG
+# costs megabytes of upload and hundreds of extra vision tokens per check.
+VISION_MAX_WIDTH = 1280
+VISION_MAX_HEIGHT = 720
+VISION_JPEG_QUALITY = 70
+VISION_DETAIL = "low"
+
+# Screens whose dHashes differ in fewer bits than this are treated as unchanged,
+# and the monitor skips the LLM calls for them
+SCREEN_CHANGE_THRESHOLD = 5
+
+# mss instances hold OS handles that can't be shared across threads
+_screen_grabber = threading.local()
+
+# Seconds between screen checks, and the quiet period after an intervention
+MONITOR_INTERVAL = 1
+INTERVENTION_COOLDOWN = 5
+
+# How often to check whether assistant audio has finished playing
+PLAYBACK_POLL_INTERVAL = 0.2
+
+# Upper bound on a single vision request, so a stalled server costs one skipped
+# check rather than hanging the monitor; transient failures are retried
+VISION_REQUEST_TIMEOUT = 8.0
+VISION_MAX_RETRIES = 2
+
+# Number of recent "no intervention" decisions remembered per exact screen
+DECISION_CACHE_SIZE = 64
+
 # Global state
-monitoring_active = False
+_stop_event = threading.Event()
+_decision_cache = OrderedDict()
 monitoring_thread = None
 last_intervention_time = 0
 activity_description = None
+_config = None
+_last_screen_hash = None
+
+def get_config():
+    """Return attend_config.yaml, parsed on first use and reused for the rest of the process."""
+    global _config
+    if _config is None:
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        with open("attend_config.yaml", 'rb') as file:
+            _config = yaml.load(file, Loader=loader)
+    return _config
+
+def capture_screen(vision_settings=None):
+    """
+    Capture the primary screen, downscaled for the vision model.
+
+    Args:
+        vision_settings (dict, optional): The client.vision section of the config,
+            with optional max_width and max_height keys.
+
+    Returns:
+        PIL.Image.Image: The RGB screenshot
+    """
+    vision_settings = vision_settings or {}
+    sct = getattr(_screen_grabber, "sct", None)
+    if sct is None:
+        sct = _screen_grabber.sct = mss.mss()
+    # monitors[1] is the primary display; monitors[0] spans all of them
+    shot = sct.grab(sct.monitors[1])
+    screenshot = Image.frombytes("RGB", shot.size, shot.rgb)
+    screenshot.thumbnail(
+        (vision_settings.get("max_width", VISION_MAX_WIDTH),
+         vision_settings.get("max_height", VISION_MAX_HEIGHT)),
+        Image.Resampling.LANCZOS
+    )
+    return screenshot
 
-def capture_screen():
-    """Capture the current screen and convert to base64."""
-    screenshot = pyautogui.screenshot()
+def encode_screen(screenshot, vision_settings=None):
+    """Encode a screenshot as base64 JPEG using client.vision's optional jpeg_quality."""
+    vision_settings = vision_settings or {}
     img_byte_arr = io.BytesIO()
-    screenshot.save(img_byte_arr, format='PNG')
-    img_byte_arr = img_byte_arr.getvalue()
-    return base64.b64encode(img_byte_arr).decode()
-
-def analyze_screen(vision_client, screen_image):
-    """Analyze screen content using vision LLM."""
+    screenshot.save(
+        img_byte_arr,
+        format='JPEG',
+        quality=vision_settings.get("jpeg_quality", VISION_JPEG_QUALITY),
+        optimize=True
+    )
+    # getbuffer() exposes the BytesIO contents without copying them first
+    return base64.b64encode(img_byte_arr.getbuffer()).decode("ascii")
+
+def screen_hash(screenshot):
+    """
+    Compute a 64-bit difference hash (dHash) of a screenshot.
+
+    Each bit records whether a pixel of a 9x8 grayscale thumbnail is brighter
+    than its right-hand neighbour, so small changes such as a blinking cursor
+    or clock flip only a few bits.
+    """
+    pixels = np.asarray(screenshot.convert("L").resize((9, 8), Image.Resampling.BILINEAR), dtype=np.int16)
+    bits = np.packbits(pixels[:, :-1] > pixels[:, 1:])
+    return int.from_bytes(bits.tobytes(), 'big')
+
+async def analyze_screen(vision_client, screen_image):
+    """
+    Have the vision LLM look at the screen and decide whether to intervene.
+
+    Returns:
+        dict: The parsed monitor_schema decision, or None on error or if the
+            reply doesn't have the decision's shape
+    """
     try:
-        with open("attend_config.yaml", 'r') as file:
-            config = yaml.safe_load(file)
-        response = vision_client.chat.completions.create(
+        config = get_config()
+        response = await vision_client.chat.completions.create(
             model=config["server-vision"]["model"],
             messages=[
+                {"role": "system", "content": f"{monitor_system_prompt}\n\nThe user said they wanted to: '{activity_description}'"},
                 {
                     "role": "user",
                     "content": [
-                        {
-                            "type": "text",
-                            "text": f"The user has said they want to {activity_description}. Looking at their screen, describe **in English only** what they are doing and whether it appears they are still engaged in their chosen activity."
-                        },
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{screen_image}"
+                                "url": f"data:image/jpeg;base64,{screen_image}",
+                                # Don't let the server upsample the downscaled capture
+                                "detail": config.get("client", {}).get("vision", {}).get("detail", VISION_DETAIL)
                             }
                         }
                     ]
                 }
-            ]
+            ],
+            response_format={"type": "json_schema", "json_schema": monitor_schema},
+            timeout=VISION_REQUEST_TIMEOUT,
         )
 
-        # print(f"Analyze screen response: {response.choices[0].message.content}")
-
-        return response.choices[0].message.content
+        # print(f"Monitor Acitivy Reported: {response.choices[0].message.content}")
+        decision = jsonx.loads(response.choices[0].message.content)
+        # Callers read the decision without guards, so check its shape here
+        outputs = decision["outputs"]
+        if outputs["should_intervene"] and not outputs.get("intervention_message"):
+            raise ValueError("intervention requested without an intervention_message")
+        return decision
+    except APITimeoutError:
+        print("Screen analysis timed out, skipping this check")
+        return None
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"Malformed screen analysis decision, skipping this check: {str(e)}")
+        return None
     except Exception as e:
-        print(f"Error in vision analysis: {str(e)}")
+        print(f"Error in screen analysis: {str(e)}")
         return None
 
-def monitor_activity(text_client, vision_client, audio_manager):
-    """Monitor user activity periodically."""
+async def observe_screen(vision_client, config, delay=0):
+    """
+    Wait delay seconds, then capture the screen and have the vision LLM assess it.
+
+    Returns None if the screen hasn't changed since the last analysis or the
+    analysis failed.
+    """
+    global _last_screen_hash
+
+    # Wait on the stop event rather than sleeping so cleanup() takes effect at once
+    if delay and await asyncio.to_thread(_stop_event.wait, delay):
+        return None
+
+    # Capture and encoding are CPU-bound, so keep them off the event loop
+    vision_settings = config.get("client", {}).get("vision")
+    screenshot = await asyncio.to_thread(capture_screen, vision_settings)
+    current_hash = screen_hash(screenshot)
+    if _last_screen_hash is not None and (current_hash ^ _last_screen_hash).bit_count() < SCREEN_CHANGE_THRESHOLD:
+        return None
+    _last_screen_hash = current_hash
+
+    screen_image = await asyncio.to_thread(encode_screen, screenshot, vision_settings)
+
+    # Reuse the decision for a screen seen before during this activity
+    key = (hashlib.sha256(screen_image.encode("ascii")).digest(), activity_description)
+    decision = _decision_cache.get(key)
+    if decision is not None:
+        _decision_cache.move_to_end(key)
+        return decision
+
+    decision = await analyze_screen(vision_client, screen_image)
+    # Only "no intervention" decisions are cached, so a cache hit can never
+    # replay an intervention message
+    if decision and not decision["outputs"]["should_intervene"]:
+        _decision_cache[key] = decision
+        if len(_decision_cache) > DECISION_CACHE_SIZE:
+            _decision_cache.popitem(last=False)
+    return decision
+
+async def warm_client(client):
+    """Open the connection to an API server ahead of the first real request."""
+    try:
+        await client.models.list()
+    except Exception as e:
+        print(f"Vision server warm-up failed: {str(e)}")
+
+async def monitor_activity_async(vision_client, audio_manager, playback_complete):
+    """
+    Monitor user activity periodically.
+
+    Capture and analysis of the next screen start in the background as soon
+    as the previous decision needs no intervention. Checks are paused while
+    the InteractionManager is playing audio, since any decision made then
+    would be discarded.
+    """
     global last_intervention_time
 
     manager = before_first_turn.manager
 
-    with open("attend_config.yaml", 'r') as file:
-        config = yaml.safe_load(file)
-    while monitoring_active:
+    config = get_config()
+
+    # Connect to the vision server while the first screen is being captured.
+    # The client's connections belong to this event loop, so warming it up
+    # has to happen here rather than in before_first_turn.
+    warmup = asyncio.create_task(warm_client(vision_client))
+
+    observation = None
+    while not _stop_event.is_set():
+        # Sleep until the cooldown since the last intervention is over, rather
+        # than polling for it every second
+        cooldown = last_intervention_time + INTERVENTION_COOLDOWN - time.time()
+        if cooldown > 0 or not playback_complete.is_set():
+            if observation:
+                observation.cancel()
+                observation = None
+            await asyncio.to_thread(_stop_event.wait, cooldown if cooldown > 0 else PLAYBACK_POLL_INTERVAL)
+            continue
+
         current_time = time.time()
-        
-        # Only check if enough time has passed since last intervention
-        if current_time - last_intervention_time >= 5:
-            # Capture and analyze screen
-            screen_image = capture_screen()
-            vision_analysis = analyze_screen(vision_client, screen_image)
-            
-            if vision_analysis:
-                # Have text LLM decide whether to intervene
-                try:
-                    response = text_client.chat.completions.create(
-                        model=config["server-text"]["model"],
-                        messages=[
-                            {"role": "system", "content": f"{monitor_system_prompt}\n\nThe user said they wanted to: '{activity_description}'"},
-                            {"role": "user", "content": f"Screen analysis: {vision_analysis}"}
-                        ],
-                        response_format={"type": "json_schema", "json_schema": monitor_schema},
-                    )
-
-                    # print(f"Monitor Acitivy Reported: {response.choices[0].message.content}")
-                    decision = json.loads(response.choices[0].message.content)
-                    if decision["outputs"]["should_intervene"]:
-
-                        intervention_message = decision['outputs']['intervention_message']
-
-                        # Update message history in InteractionManager
-                        manager.messages.append({
-                            "role": "assistant",
-                            "content": intervention_message
-                        })
-                        # Also update tentative messages to stay in sync
-                        manager.messages_tentative = manager.messages.copy()
-
-                        # Trigger intervention
-                        print(f"Intervention triggered: {intervention_message}")
-                        # Stream intervention message using TTS
-                        stream_text(
-                            text= intervention_message,
-                            audio_manager=audio_manager
-                        )
-                        last_intervention_time = current_time
-                
-                except Exception as e:
-                    print(f"Error in intervention decision: {str(e)}")
-        
-        time.sleep(1)  # Small delay to prevent excessive CPU usage
+        if observation is None:
+            observation = asyncio.create_task(observe_screen(vision_client, config))
+        decision = await observation
+        observation = None
+
+        if not (decision and decision["outputs"]["should_intervene"]):
+            # Start on the next screen right away
+            observation = asyncio.create_task(observe_screen(vision_client, config, delay=MONITOR_INTERVAL))
+            continue
+
+        intervention_message = decision['outputs'].get('intervention_message')
+
+        # Update message history in InteractionManager
+        manager.add_message({
+            "role": "assistant",
+            "content": intervention_message
+        })
+
+        # Trigger intervention
+        print(f"Intervention triggered: {intervention_message}")
+        # Stream intervention message using TTS
+        await asyncio.to_thread(
+            stream_text,
+            text=intervention_message,
+            audio_manager=audio_manager
+        )
+        last_intervention_time = current_time
+
+    if observation:
+        observation.cancel()
+    warmup.cancel()
+
+def monitor_activity(vision_client, audio_manager, playback_complete):
+    """Run the activity monitor's event loop on the calling (monitoring) thread."""
+    asyncio.run(monitor_activity_async(vision_client, audio_manager, playback_complete))
 
 def before_first_turn():
     """Initialize activity monitoring."""
-    global activity_description, monitoring_active, monitoring_thread
+    global activity_description, monitoring_thread, _last_screen_hash
     
     # Initialize clients
-    with open("attend_config.yaml", 'r') as file:
-        config = yaml.safe_load(file)
+    config = get_config()
     
-    text_config = config["server-text"]
     vision_config = config["server-vision"]
     
-    text_client = OpenAI(
-        api_key=text_config["key"],
-        base_url=f"{text_config['host']}:{text_config['port']}/v1"
-    )
-    
-    vision_client = OpenAI(
+    # One HTTP/2 connection pool for the monitor, so the warm-up and the
+    # overlapping screen checks multiplex over the same connection
+    vision_client = AsyncOpenAI(
         api_key=vision_config["key"],
-        base_url=f"{vision_config['host']}:{vision_config['port']}/v1"
+        base_url=f"{vision_config['host']}:{vision_config['port']}/v1",
+        timeout=VISION_REQUEST_TIMEOUT,
+        max_retries=VISION_MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            http2=True,
+            timeout=VISION_REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+        )
     )
     
-    # Start monitoring thread
-    monitoring_active = True
+    # Start monitoring thread; the first screen of a new activity is always analyzed
+    _last_screen_hash = None
+    _stop_event.clear()
     # Get audio manager from the module's scope
     # This will be set by InteractionManager when initializing the mode
     if not hasattr(before_first_turn, 'manager'):
         raise RuntimeError("InteractionManager instance not passed to before_first_turn")
     
     audio_manager = before_first_turn.manager.audio_device_manager
+    playback_complete = before_first_turn.manager.playback_complete
     monitoring_thread = threading.Thread(
         target=monitor_activity,
-        args=(text_client, vision_client, audio_manager)
+        args=(vision_client, audio_manager, playback_complete)
     )
     monitoring_thread.daemon = True
     monitoring_thread.start()
@@ -238,9 +405,9 @@ def after_attend_turn():
 
 def cleanup():
     """Clean up monitoring thread."""
-    global monitoring_active, monitoring_thread
+    global monitoring_thread
     
-    monitoring_active = False
+    _stop_event.set()
     if monitoring_thread:
         monitoring_thread.join()
         monitoring_thread = None
@@ -17,9 +17,26 @@
 
 import pyaudio
 import threading
+import queue
 import yaml
 from typing import Optional, Dict, Tuple
 
+# Sample formats that may be named in client.audio.format (e.g. "pyaudio.paInt16")
+_FORMAT_MAP = {
+    "paInt8": pyaudio.paInt8,
+    "paInt16": pyaudio.paInt16,
+    "paInt24": pyaudio.paInt24,
+    "paInt32": pyaudio.paInt32,
+    "paFloat32": pyaudio.paFloat32,
+}
+
+def audio_format(name: str) -> int:
+    """Return the PyAudio format constant for a configured format name such as "pyaudio.paInt16"."""
+    format_name = name.split('.')[-1]
+    if format_name not in _FORMAT_MAP:
+        raise ValueError(f"Unsupported audio format: {name}")
+    return _FORMAT_MAP[format_name]
+
 class AudioDeviceManager:
     """
     Centralized manager for audio devices handling both input and output streams.
@@ -39,13 +56,15 @@ class AudioDeviceManager:
         self._debug = debug
         
         # Load configuration
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        # libyaml's C loader when PyYAML was built with it
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        with open(config_path, 'rb') as f:
+            config = yaml.load(f, Loader=loader)
             self._audio_config = config['client']['audio']
             
         # Store audio parameters from config
         self._rate = self._audio_config['rate']
-        self._format = eval(self._audio_config['format'])  # Safely evaluate pyaudio.paInt16
+        self._format = audio_format(self._audio_config['format'])
         self._channels = self._audio_config['channels']
         self._chunk = self._audio_config['chunk']
         
@@ -57,6 +76,10 @@ class AudioDeviceManager:
         # Initialize input/output streams as None
         self._input_stream = None
         self._output_stream = None
+
+        # Chunks recorded by the input stream's callback, waiting for read_input()
+        self._input_chunks = queue.SimpleQueue()
+        self.input_overflows = 0  # Chunks PortAudio reported as overflowed
         
     @property
     def input_stream(self) -> Optional[pyaudio.Stream]:
@@ -91,7 +114,8 @@ class AudioDeviceManager:
                     input=True,
                     output=False,
                     frames_per_buffer=self._chunk,
-                    input_device_index=input_device_index
+                    input_device_index=input_device_index,
+                    stream_callback=self._input_callback
                 )
                 self._active_streams['input'] = self._input_stream
                 
@@ -107,9 +131,35 @@ class AudioDeviceManager:
                     output_device_index=output_device_index
                 )
                 self._active_streams['output'] = self._output_stream
+
+            # Validated once here so TTS playback can write without re-checking
+            if not self._output_stream.is_active():
+                raise RuntimeError("Audio output stream is not active")
                 
             return self._input_stream, self._output_stream
             
+    def _input_callback(self, in_data, frame_count, time_info, status):
+        """PortAudio callback for the input stream: queue the chunk for read_input() and continue."""
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        self._input_chunks.put(in_data)
+        return (None, pyaudio.paContinue)
+
+    def read_input(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Return the next chunk recorded by the input stream from initialize_streams().
+
+        Args:
+            timeout: Seconds to wait for a chunk (default: None to wait indefinitely)
+
+        Returns:
+            The chunk's raw audio, or None if no chunk arrived within timeout
+        """
+        try:
+            return self._input_chunks.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
     def create_input_stream(self, 
                           format: Optional[int] = None,
                           channels: Optional[int] = None,
@@ -16,7 +16,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from enum import Enum
-from typing import Callable, Dict, List, Set
+from typing import Callable, List, Tuple
 
 class SpeechEvent(Enum):
     SPEECH_START_POTENTIAL = "speech_start_potential"
@@ -27,20 +27,31 @@ class SpeechEvent(Enum):
     FALSE_END = "false_end"
     NEW_TRANSCRIPTION = "new_transcription"
 
+# Give each event a small integer index so EventEmitter can keep listeners in a
+# list; dict lookups on Enum members go through Enum.__hash__, which is Python code
+for _idx, _event in enumerate(SpeechEvent):
+    _event._idx = _idx
+
 class EventEmitter:
     def __init__(self):
-        self._listeners: Dict[SpeechEvent, Set[Callable]] = {event: set() for event in SpeechEvent}
+        # Listeners are kept as immutable tuples in registration order, indexed by
+        # SpeechEvent._idx. on()/off() replace the tuple, so emit() can iterate it
+        # without copying and callbacks may register or remove listeners while an
+        # event is being dispatched.
+        self._tables: List[Tuple[Callable, ...]] = [() for _ in SpeechEvent]
 
     def on(self, event: SpeechEvent, callback: Callable) -> None:
         """Register a callback for a specific event."""
-        self._listeners[event].add(callback)
+        if callback not in self._tables[event._idx]:
+            self._tables[event._idx] += (callback,)
 
     def off(self, event: SpeechEvent, callback: Callable) -> None:
         """Remove a callback for a specific event."""
-        if callback in self._listeners[event]:
-            self._listeners[event].remove(callback)
+        listeners = self._tables[event._idx]
+        if callback in listeners:
+            self._tables[event._idx] = tuple(cb for cb in listeners if cb != callback)
 
     def emit(self, event: SpeechEvent, *args, **kwargs) -> None:
         """Emit an event with optional arguments."""
-        for callback in self._listeners[event]:
+        for callback in self._tables[event._idx]:
             callback(*args, **kwargs)
@@ -15,20 +15,96 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import io
-from typing import List
+import queue
+import threading
+from typing import Callable, List, Optional
+
+class SpscRing:
+    """
+    Fixed-size single-producer/single-consumer ring of audio buffers.
+
+    Only the producer advances tail and only the consumer advances head, so
+    under the GIL neither side needs a lock. The capacity is rounded up to a
+    power of two so a slot index is a mask rather than a modulo.
+
+    clear() may be called from a third thread: it only records how far the
+    queue has been cleared, and the consumer drops those buffers itself.
+    """
+    def __init__(self, capacity: int = 64):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._slots: List[Optional[bytes]] = [None] * size
+        self._mask = size - 1
+        self.head = 0  # Next slot to pop, owned by the consumer
+        self.tail = 0  # Next slot to push, owned by the producer
+        self._cleared = 0  # Everything before this slot has been cleared
+
+    def __len__(self):
+        return self.tail - max(self.head, self._cleared)
+
+    def try_push(self, data: bytes) -> bool:
+        """Add data at the tail; returns False if the ring is full."""
+        tail = self.tail
+        if tail - self.head > self._mask:
+            return False
+        self._slots[tail & self._mask] = data
+        self.tail = tail + 1
+        return True
+
+    def try_pop(self) -> Optional[bytes]:
+        """Remove and return the data at the head, or None if the ring is empty."""
+        head = self.head
+        # Release whatever was cleared since the last pop
+        cleared = self._cleared
+        while head < cleared:
+            self._slots[head & self._mask] = None
+            head += 1
+        if head == self.tail:
+            self.head = head
+            return None
+        index = head & self._mask
+        data = self._slots[index]
+        self._slots[index] = None
+        self.head = head + 1
+        return data
+
+    def snapshot(self) -> List[bytes]:
+        """Return the queued buffers, oldest first, without removing them."""
+        start = max(self.head, self._cleared)
+        return [self._slots[i & self._mask] for i in range(start, self.tail)]
+
+    def clear(self):
+        """Drop everything queued so far."""
+        self._cleared = self.tail
 
 class AudioProcessor:
     def __init__(self, audio_device_manager):
         self.audio_device_manager = audio_device_manager
-        self.queued_audio: List[bytes] = []
-        self.queue_lock = None  # Will be set by InteractionManager
+        # TTS results are pushed by the TTS worker and popped only by the
+        # playback thread, so the ring really has a single consumer
+        self.audio_ring = SpscRing()
         self._output_stream = None
+        # Playback requests as (playback_complete, then, done); None stops the thread
+        self._play_requests = queue.SimpleQueue()
+        self._player = threading.Thread(target=self._playback_loop, daemon=True, name="audio-playback")
+        self._player.start()
+
+    @property
+    def queued_audio(self) -> List[bytes]:
+        """Audio currently waiting to be played, oldest first."""
+        return self.audio_ring.snapshot()
 
     def _ensure_output_stream(self):
-        """Ensure we have an active output stream."""
+        """
+        Ensure we have an active output stream, reusing the device manager's
+        long-lived stream so playback doesn't pay to open a new one.
+        """
         if not self._output_stream or not self._output_stream.is_active():
-            self._output_stream = self.audio_device_manager.create_output_stream()
+            stream = self.audio_device_manager.output_stream
+            if not stream or not stream.is_active():
+                stream = self.audio_device_manager.create_output_stream()
+            self._output_stream = stream
         return self._output_stream
 
     def play_audio_now(self, audio_data: bytes, playback_complete):
@@ -42,48 +118,82 @@ class AudioProcessor:
             output_stream = self._ensure_output_stream()
             #print("[AudioProcessor] Output stream ensured")
             
-            # Play the audio
-            chunk_size = 1024
-            audio_buffer = io.BytesIO(audio_data)
-            
+            # Play the audio in a single write; PortAudio buffers it internally
             #print("[AudioProcessor] Starting audio playback")
-            while True:
-                chunk = audio_buffer.read(chunk_size)
-                if not chunk:
-                    break
-                output_stream.write(chunk)
+            output_stream.write(audio_data)
             #print("[AudioProcessor] Audio playback completed")
                 
         except Exception as e:
             #print(f"[AudioProcessor] Error playing audio: {e}")
-            # If there was an error, close the stream to force recreation next time
+            # Restart the stream to reset its buffer instead of reopening the
+            # device; only fall back to a fresh stream if the restart fails
             if self._output_stream:
-                self.audio_device_manager.close_stream('output')
-                self._output_stream = None
+                try:
+                    self._output_stream.stop_stream()
+                    self._output_stream.start_stream()
+                except Exception:
+                    self._output_stream = None
         finally:
             playback_complete.set()
             #print("[AudioProcessor] Playback complete event set")
 
     def queue_audio(self, audio_data: bytes):
         """Queue audio for playback after speech ends."""
-        with self.queue_lock:
-            self.queued_audio.append(audio_data)
-            #print(f"[AudioProcessor] Audio queued. Queue size: {len(self.queued_audio)}")
+        if not self.audio_ring.try_push(audio_data):
+            print("Error queueing audio: playback queue is full, dropping audio")
+        #print(f"[AudioProcessor] Audio queued. Queue size: {len(self.audio_ring)}")
+
+    def clear_queued_audio(self):
+        """Drop any audio that hasn't been played yet."""
+        self.audio_ring.clear()
 
     def play_queued_audio(self, playback_complete):
-        """Play all queued audio."""
+        """
+        Play all queued audio. This pops the ring, so outside of tests it must
+        only run on the playback thread; use request_playback() instead.
+        """
         #print("[AudioProcessor] Attempting to play queued audio")
-        with self.queue_lock:
-            queue_size = len(self.queued_audio)
-            #print(f"[AudioProcessor] Queue size: {queue_size}")
-            for i, audio_data in enumerate(self.queued_audio, 1):
-                #print(f"[AudioProcessor] Playing audio {i} of {queue_size}")
-                self.play_audio_now(audio_data, playback_complete)
-            self.queued_audio = []
+        # All queued items are 16-bit PCM from the same TTS server, so they can
+        # be joined and played in one go
+        #print(f"[AudioProcessor] Queue size: {len(self.audio_ring)}")
+        parts = []
+        data = self.audio_ring.try_pop()
+        while data is not None:
+            parts.append(data)
+            data = self.audio_ring.try_pop()
+        merged = b"".join(parts)
+        if merged:
+            self.play_audio_now(merged, playback_complete)
         #print("[AudioProcessor] Finished playing all queued audio")
 
+    def request_playback(self, playback_complete, then: Optional[Callable[[], None]] = None) -> threading.Event:
+        """
+        Have the playback thread play all queued audio, then call then() if
+        given. Returns at once with an event that is set when both are done.
+        """
+        done = threading.Event()
+        self._play_requests.put((playback_complete, then, done))
+        return done
+
+    def _playback_loop(self):
+        """Play queued audio on request; the only thread that pops the ring or plays it."""
+        while True:
+            request = self._play_requests.get()
+            if request is None:
+                break
+            playback_complete, then, done = request
+            try:
+                self.play_queued_audio(playback_complete)
+                if then is not None:
+                    then()
+            except Exception as e:
+                print(f"Error in playback thread: {str(e)}")
+            finally:
+                done.set()
+
     def cleanup(self):
         """Clean up resources."""
+        self._play_requests.put(None)
         if self._output_stream:
             self.audio_device_manager.close_stream('output')
             self._output_stream = None
@@ -21,28 +21,52 @@ import yaml
 import time
 import threading
 import traceback
-import json
-import nltk
+import queue
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from openai import OpenAI
-from typing import List, Dict, Any
-from services.manage_recording import AudioRecordingService
+from typing import List, Dict, Any, Optional
+from services.manage_recording import AudioRecordingService, PipelineState, DISCARDED_PIPELINE_STATES
 from services.event_system import EventEmitter, SpeechEvent
-from functions.streamtts import stream_text
+from functions import jsonx
+from functions.streamtts import stream_text_cached
+from modes import mode_spec
 from .audio import AudioProcessor
 from .tts import TTSProcessor
+from .stream_parser import StreamParser
+
+# Characters after which a delta is parsed straight away because they can
+# complete a sentence or a token the parser is waiting for
+_PARSE_NOW_RE = re.compile(r'[.?!"\n]')
+# Longest time other deltas are batched before being parsed, in seconds
+PARSE_BATCH_INTERVAL = 0.008
+
+def _no_log(message):
+    """Stands in for InteractionManager._log while debug is off."""
 
 class InteractionManager:
+    # Mode modules already imported, by name
+    _MODE_CACHE: Dict[str, Any] = {}
+
     def __init__(self, config_path: str, recording_service: AudioRecordingService, audio_device_manager):
         """Initialize the interaction manager."""
-        with open(config_path, 'r') as file:
-            self.config = yaml.safe_load(file)
+        # libyaml's C loader when PyYAML was built with it
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        with open(config_path, 'rb') as file:
+            self.config = yaml.load(file, Loader=loader)
             
         self.recording_service = recording_service
         self.audio_device_manager = audio_device_manager
         self.events = EventEmitter()
         self.current_mode = None
-        self.messages: List[Dict[str, str]] = []
-        self.messages_tentative: List[Dict[str, str]] = []
+        # The conversation is a single deque: the first _committed messages
+        # are the confirmed conversation, anything after them is tentative
+        self._msgs: deque = deque()
+        self._committed = 0
+        # List copy of _msgs handed to LLM requests, rebuilt only after _msgs changes
+        self._tentative_list = None
         self.debug = False
         
         # State management
@@ -56,10 +80,30 @@ class InteractionManager:
         
         # Audio processing
         self.audio_processor = AudioProcessor(audio_device_manager)
-        self.audio_processor.queue_lock = threading.Lock()
+        
+        # One HTTP/2 connection pool shared by the LLM and TTS clients, so
+        # requests reuse warm connections instead of each client keeping its own
+        self.http_client = httpx.Client(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16)
+        )
         
         # TTS processing
-        self.tts_processor = TTSProcessor(self.config)
+        self.tts_processor = TTSProcessor(self.config, http_client=self.http_client)
+        # Sentences are synthesized on worker threads so the LLM stream keeps
+        # being read while earlier sentences are still at the TTS server
+        self.tts_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts")
+        # Synthesis jobs in sentence order, handed to the audio processor by a
+        # dedicated worker as soon as each finishes. The bound keeps the LLM
+        # loop from running arbitrarily far ahead of synthesis
+        self.tts_jobs = queue.Queue(maxsize=16)
+        # Bumped to discard the jobs of a cancelled response
+        self.tts_generation = 0
+        self.tts_worker = threading.Thread(target=self._tts_loop, daemon=True)
+        self.tts_worker.start()
+        # Open the TTS connection now instead of on the first turn's first sentence
+        self.tts_executor.submit(self.tts_processor.warm_up)
         
         # Playback control
         self.playback_complete = threading.Event()
@@ -69,7 +113,8 @@ class InteractionManager:
         text_config = self.config["server-text"]
         self.llm_client = OpenAI(
             api_key=text_config["key"],
-            base_url=f"{text_config['host']}:{text_config['port']}/v1"
+            base_url=f"{text_config['host']}:{text_config['port']}/v1",
+            http_client=self.http_client
         )
         
         # Set up event listeners
@@ -78,6 +123,73 @@ class InteractionManager:
         self.events.on(SpeechEvent.SPEECH_ENDED, self._handle_speech_ended)
         self.events.on(SpeechEvent.NEW_TRANSCRIPTION, self._handle_transcription)
         
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        A copy of the committed conversation. Changes to it are not kept;
+        use add_message() to add to the conversation.
+        """
+        return list(islice(self._msgs, 0, self._committed))
+
+    @messages.setter
+    def messages(self, value: List[Dict[str, str]]):
+        self._msgs = deque(value)
+        self._committed = len(self._msgs)
+        self._tentative_list = None
+
+    @property
+    def messages_tentative(self) -> List[Dict[str, str]]:
+        """
+        The committed conversation plus the turn in progress. The same list is
+        returned until the conversation changes, so it must not be modified.
+        """
+        tentative = self._tentative_list
+        if tentative is None:
+            tentative = self._tentative_list = list(self._msgs)
+        return tentative
+
+    @messages_tentative.setter
+    def messages_tentative(self, value: List[Dict[str, str]]):
+        self._msgs = deque(value)
+        self._committed = min(self._committed, len(self._msgs))
+        self._tentative_list = None
+
+    def add_message(self, message: Dict[str, str]):
+        """
+        Add a message to the committed conversation, for things Attend says
+        outside of a turn. A turn in progress stays tentative, after it.
+        """
+        with self.pipeline_lock:
+            self._msgs.insert(self._committed, message)
+            self._committed += 1
+            self._tentative_list = None
+
+    def _append_tentative(self, message: Dict[str, str]):
+        """Add a message to the turn in progress. Call with pipeline_lock held."""
+        self._msgs.append(message)
+        self._tentative_list = None
+
+    def _rollback_messages(self):
+        """Drop any tentative messages, back to the committed conversation."""
+        if len(self._msgs) > self._committed:
+            while len(self._msgs) > self._committed:
+                self._msgs.pop()
+            self._tentative_list = None
+
+    @property
+    def debug(self):
+        return self._debug
+
+    @debug.setter
+    def debug(self, value):
+        self._debug = value
+        # With debug off, _log is swapped for a no-op so hot paths skip the
+        # method call; with it on, the instance falls back to the method
+        if value:
+            self.__dict__.pop('_log', None)
+        else:
+            self._log = _no_log
+
     def _log(self, message):
         """Print debug messages if debug mode is enabled."""
         if self.debug:
@@ -95,24 +207,31 @@ class InteractionManager:
             self.current_pipeline = None
             self.json_processed = False
             self.current_response = ""
-        self.audio_processor.queued_audio = []
+            self.tts_generation += 1
+        self.audio_processor.clear_queued_audio()
         
     def _handle_speech_ended(self, *args):
-        """Handle confirmed end of speech."""
-        self._log("Speech ended")
-
-        # Play any queued audio responses
-        self._play_queued_audio()
-
+        """
+        Handle confirmed end of speech.
 
+        This runs on the recording service's VAD thread, so it only commits
+        the response here. Playing the queued audio, and parsing the response
+        afterwards (which may switch mode and speak a greeting), are handed to
+        the audio processor's playback thread.
+        """
+        self._log("Speech ended")
         self.speech_ended.set()
         self._log("_handle_speech_ended Playing queued audio and appending messages")
         
         # Process any pending responses
-        if not self.json_processed:
+        parse = None
+        if self._commit_response():
             self._log("recording_service.manager.pipeline_state was confirmed and ~self.json_processed during _handle_speech_ended parsing accumelated response")
-            self.messages = self.messages_tentative
-            self.parse_accumulated_response()                
+            response = self.current_response
+            parse = lambda: self.parse_accumulated_response(response)
+
+        # Play any queued audio responses, then act on the response
+        self.audio_processor.request_playback(self.playback_complete, then=parse)
 
         
         
@@ -127,24 +246,78 @@ class InteractionManager:
         #     self.recording_service.manager.reset()
         
         # Clear completion flags
-        self.json_processed = False
-        self.current_response = ""
+        with self.pipeline_lock:
+            self.json_processed = False
+            self.current_response = ""
         
+    def _commit_response(self):
+        """
+        Make the tentative messages the conversation and claim the current
+        response for parsing. The speech-ended and transcription handlers run
+        on different threads and both try this, so the check and the update
+        happen under pipeline_lock; only the caller that gets True parses.
+        """
+        with self.pipeline_lock:
+            if self.json_processed:
+                return False
+            self._committed = len(self._msgs)
+            self.json_processed = True
+            return True
+
     def _play_queued_audio(self):
-        """Play queued audio after LLM response processing."""
+        """
+        Play queued audio after LLM response processing. Playback happens on
+        the audio processor's own thread, the only consumer of its queue;
+        this waits until it has finished.
+        """
         self._log("Attempting to play queued audio")
-        try:
-            self.audio_processor.play_queued_audio(self.playback_complete)
-            self._log("Queued audio playback initiated")
-        except Exception as e:
-            self._log(f"Error playing queued audio: {str(e)}")
-            self._log(f"Traceback: {traceback.format_exc()}")
+        self.audio_processor.request_playback(self.playback_complete).wait()
+        self._log("Queued audio playback finished")
 
     
-    def parse_accumulated_response(self):
-        self.json_processed=True
+    def _tts_loop(self):
+        """Hand synthesized sentences to the audio processor in the order they were submitted."""
+        while True:
+            generation, job = self.tts_jobs.get()
+            # A flush marker; everything submitted before it has been handled
+            if isinstance(job, threading.Event):
+                job.set()
+                continue
+            try:
+                if generation != self.tts_generation or job.cancelled():
+                    continue
+                audio_data = job.result()
+                if audio_data and generation == self.tts_generation:
+                    self.audio_processor.queue_audio(audio_data)
+                    # If the pipeline has been confirmed, play the queued audio
+                    if self.recording_service.manager.pipeline_state == PipelineState.CONFIRMED:
+                        self._log("Playing queued audio from the TTS worker")
+                        self._play_queued_audio()
+            except Exception as e:
+                print(f"Error delivering TTS audio: {str(e)}")
+
+    def _submit_tts(self, sentence, generation):
+        """Start synthesizing a sentence in the background, keeping playback order."""
+        future = self.tts_executor.submit(self.tts_processor.process_tts, sentence)
+        self.tts_jobs.put((generation, future))
+        return future
+
+    def _flush_tts(self, generation):
+        """Wait until every sentence submitted so far has been queued for playback."""
+        done = threading.Event()
+        self.tts_jobs.put((generation, done))
+        done.wait()
+
+    def parse_accumulated_response(self, response: Optional[str] = None):
+        """
+        Parse a complete response and act on it, switching mode if it asks to.
+        Without a response, the current one is claimed and parsed.
+        """
+        if response is None:
+            self.json_processed = True
+            response = self.current_response
         try:
-            response_data = json.loads(self.current_response)
+            response_data = jsonx.loads(response)
             outputs = response_data.get('outputs', {})
 
             if 'next_mode' in outputs:
@@ -153,7 +326,9 @@ class InteractionManager:
 
                 next_mode = outputs['next_mode']
                 activity_description = outputs['activity_description']
-                module = import_module(f"modes.{next_mode}")      
+                module = self._MODE_CACHE.get(next_mode)
+                if module is None:
+                    module = self._MODE_CACHE[next_mode] = import_module(f"modes.{next_mode}")
 
                 self._log(f"Imported module")
 
@@ -177,8 +352,8 @@ class InteractionManager:
             else:
                 raise ValueError("Invalid response format")
 
-        except json.JSONDecodeError:
-            self._log(f"Invalid JSON in current_response. current_response: {self.current_response}")
+        except jsonx.JSONDecodeError:
+            self._log(f"Invalid JSON in current_response. current_response: {response}")
             
         except KeyError as e:
             self._log(f"Missing required key in response: {e}")        
@@ -198,19 +373,22 @@ class InteractionManager:
         self._log(f"Handling transcription: {text}")
         
         # Get current pipeline ID and check state
-        pipeline_id = self.recording_service.manager.current_pipeline_id
-        pipeline_state = self.recording_service.manager.pipeline_state
+        # Looked up once; the streaming loop below checks its state on every chunk
+        recording_manager = self.recording_service.manager
+        pipeline_id = recording_manager.current_pipeline_id
+        pipeline_state = recording_manager.pipeline_state
         
-        if pipeline_state in ['cancelled', 'false']:
+        if pipeline_state in DISCARDED_PIPELINE_STATES:
             self._log(f"Pipeline {pipeline_id} is no longer valid (state: {pipeline_state})")
             return
             
-        # Setup tetative messages
-        self.messages_tentative = self.messages.copy()
-        self.messages_tentative.append({
-            "role": "user",
-            "content": text
-        })
+        # Setup tetative messages, dropping those of any turn that wasn't committed
+        with self.pipeline_lock:
+            self._rollback_messages()
+            self._append_tentative({
+                "role": "user",
+                "content": text
+            })
         
         # Stream LLM response and TTS
         try:
@@ -232,103 +410,89 @@ class InteractionManager:
                 stream=True
             )
             
-            # Initialize parameters for looping through the chunks
-            accumulated_response = ""
-            accumulated_assistant_response = ""
-            response_type_known = False            
-            assistant_response_start_reached = False
-            assistant_response_end_reached = False
-            # There will be at least one sentence if there is content.
-            # Once we are on the second, we can send the first for TTS, and so on
-            accumulated_assistant_response = ""            
-            n_identified_sentences = 1 
-            processed_sentences = set()
+            # The parser tracks where we are in the streamed JSON and
+            # picks complete sentences out of the assistant response
+            parser = StreamParser()
+            generation = self.tts_generation
+            # Futures for sentences sent to TTS, so they can be cancelled
+            pending_tts = []
+            # Deltas not parsed yet
+            batch = []
+            last_parse = time.monotonic()
+            after_terminator = False
+            # Local names for what the loop uses on every chunk
+            monotonic = time.monotonic
+            parse_now = _PARSE_NOW_RE.search
+            feed = parser.feed
+            submit_tts = self._submit_tts
+            log = self._log
             
             for chunk in response: 
                 # Check pipeline state before processing each chunk and return if needed
-                current_state = self.recording_service.manager.pipeline_state
-                if current_state in ['cancelled', 'false']:
-                    self._log(f"Pipeline {pipeline_id} cancelled during processing")
+                current_state = recording_manager.pipeline_state
+                if current_state in DISCARDED_PIPELINE_STATES:
+                    log(f"Pipeline {pipeline_id} cancelled during processing")
+                    with self.pipeline_lock:
+                        self.tts_generation += 1
+                    for future in pending_tts:
+                        future.cancel()
                     return
                 # For each incoming piece of response
-                if chunk.choices[0].delta.content is not None:
-                    # Accumulate it
-                    content = chunk.choices[0].delta.content
-                    #print(content)
-                    accumulated_response += content
-                    #self._log(f"Received chunk: {content}")
-                    
-                    # Check if we know the type of response we're getting yet
-                    if not response_type_known:
-                        # Use regex to match the pattern of the JSON response and account for whitespace
-                        match = re.search(r'"outputs"\s*:\s*{\s*"(\w+)"', accumulated_response)
-                        #print(match)
-                        if match:
-                            response_type = match.group(1)
-                            response_type_known = True
-                    # if we already know and it is the assistant_response we'll look for sentences.
-                    elif response_type == "assistant_response":
-                        # We need to check if we've gotten all the way to the text of the response
-                        if not assistant_response_start_reached:
-                            match = re.search(r'"outputs"\s*:\s*{\s*"assistant_response"\s*:\s*"', accumulated_response)
-                            if match:
-                                assistant_response_start_reached = True
-                        # Once we have, parse, unless we've reached the end
-                        elif not assistant_response_end_reached:                            
-                            accumulated_assistant_response += content
-                            #Check if we've reached the end
-                            if re.search(r'.*"', accumulated_assistant_response):
-                                # if so, mark that we're at the end
-                                assistant_response_end_reached = True
-                                
-                                # and send the final sentence for tts
-                                sentences = nltk.sent_tokenize(accumulated_assistant_response)
-                                self._log(f"Sending final sentence '{sentences[n_identified_sentences - 1]}' for TTS streaming")
-                                audio_data = self.tts_processor.process_tts(sentences[n_identified_sentences - 1])
-                                self._log(f"Queing audio for {sentences[n_identified_sentences - 1]}")
-                                self.audio_processor.queue_audio(audio_data)
-                                # If the pipeline has been confirmed, play the queued audio
-                                if self.recording_service.manager.pipeline_state == 'confirmed':
-                                    self._log("Playing queued audio within _handle_transcription")
-                                    self._play_queued_audio()
-                            # if not at the end yet
-                            else:
-                                 sentences = nltk.sent_tokenize(accumulated_assistant_response)
-                                 # If there are more sentences than previously, send the penultimate for TTS streaming
-                                 if len(sentences) > n_identified_sentences:
-                                    self._log(f"Accumulated assistant response so far: {accumulated_assistant_response}")
-                                    audio_data = self.tts_processor.process_tts(sentences[n_identified_sentences - 1])
-                                    self.audio_processor.queue_audio(audio_data)
-                                    # If the pipeline has been confirmed, play the queued audio
-                                    if self.recording_service.manager.pipeline_state == 'confirmed':
-                                        self._play_queued_audio()
-                                    n_identified_sentences += 1
-
-
-            self._log(f"Finished processing response: {accumulated_response}")
-            # Save the full response (not just the assistant response)
-            self.current_response = accumulated_response
-            # This response has not yet had its JSON parsed
-            self.json_processed = False
+                content = chunk.choices[0].delta.content
+                if content is not None:
+                    batch.append(content)
+                    now = monotonic()
+                    # Mid-word deltas are batched; anything that may finish a
+                    # sentence, and the delta right after it, is parsed at once
+                    terminator = parse_now(content) is not None
+                    if terminator or after_terminator or now - last_parse > PARSE_BATCH_INTERVAL:
+                        # send each sentence for tts as soon as it completes
+                        for sentence in feed("".join(batch)):
+                            if self.debug:
+                                log(f"Sending sentence '{sentence}' for TTS streaming")
+                            pending_tts.append(submit_tts(sentence, generation))
+                        batch.clear()
+                        last_parse = now
+                    after_terminator = terminator
+
+            # Send anything left if the response ended mid-sentence, then
+            # wait for the remaining sentences, in order
+            for sentence in parser.feed("".join(batch)) + parser.close():
+                if self.debug:
+                    self._log(f"Sending final sentence '{sentence}' for TTS streaming")
+                pending_tts.append(self._submit_tts(sentence, generation))
+            self._flush_tts(generation)
+            accumulated_response = parser.response
+            accumulated_assistant_response = parser.assistant_response
+
+
+            if self.debug:
+                self._log(f"Finished processing response: {accumulated_response}")
+            with self.pipeline_lock:
+                # Save the full response (not just the assistant response)
+                self.current_response = accumulated_response
+                # This response has not yet had its JSON parsed
+                self.json_processed = False
 
-            # Update tentative messages if the assistant said anything
-            if accumulated_assistant_response != "":
-                self.messages_tentative.append({
-                    "role": "assistant",
-                    "content": accumulated_assistant_response
-                })
+                # Update tentative messages if the assistant said anything
+                if accumulated_assistant_response != "":
+                    self._append_tentative({
+                        "role": "assistant",
+                        "content": accumulated_assistant_response
+                    })
 
-            self._log(f"Finished _handle_transcription loop. Current messages_tentative: {self.messages_tentative}")
+            if self.debug:
+                self._log(f"Finished _handle_transcription loop. Current messages_tentative: {self.messages_tentative}")
 
 
             self._log(f"Checking if pipeline is confirmed within _handle_transcription")
             # if the pipeline has been confirmed, save them as actual messages,
             # play any remaining audio, and parse the response
-            if self.recording_service.manager.pipeline_state == 'confirmed':              
+            if recording_manager.pipeline_state == PipelineState.CONFIRMED:              
                 self._log("Pipeline confirmed within _handle_transcription")  
-                self.messages = self.messages_tentative
                 self._play_queued_audio()
-                self.parse_accumulated_response()
+                if self._commit_response():
+                    self.parse_accumulated_response()
                 
                 
             
@@ -345,41 +509,45 @@ class InteractionManager:
         """Set the current interaction mode."""
         self._log(f"Setting mode: {mode.__name__ if hasattr(mode, '__name__') else mode}")
         self.current_mode = mode
+        spec = mode_spec(mode)
         
         # Initialize mode
-        if hasattr(mode, 'before_first_turn'):
+        if spec.before_first_turn is not None:
             self._log("Calling before_first_turn")
             # Pass manager instance to before_first_turn
-            mode.before_first_turn.manager = self
-            mode.before_first_turn()
+            spec.before_first_turn.manager = self
+            spec.before_first_turn()
             
         # Handle mode initialization
-        if hasattr(mode, 'initialize'):
+        if spec.initialize is not None:
             self._log("Mode has initialization configuration")
-            if isinstance(mode.initialize, dict):
-                if "greeting" in mode.initialize:
-                    self._log(f"Processing greeting: {mode.initialize['greeting']['text']}")
-                    stream_text(
-                        text=mode.initialize["greeting"]["text"], 
+            if isinstance(spec.initialize, dict):
+                if "greeting" in spec.initialize:
+                    greeting = spec.initialize["greeting"]
+                    self._log(f"Processing greeting: {greeting['text']}")
+                    stream_text_cached(
+                        text=greeting["text"], 
                         audio_manager=self.audio_device_manager,
-                        speed=mode.initialize["greeting"]["speed"]
+                        speed=greeting["speed"],
+                        # The TTS processor's client is already warm
+                        client=self.tts_processor.client
                     )
                     self.messages = [
-                        {"role": "system", "content": mode.system_prompt},
+                        {"role": "system", "content": spec.system_prompt},
                         {"role": "user", "content": "Let's get to it."},
-                        {"role": "assistant", "content": mode.initialize["greeting"]["text"]}
+                        {"role": "assistant", "content": greeting["text"]}
                     ]
                     self._log("Greeting processed and messages initialized")
-                elif "prompt" in mode.initialize:
+                elif "prompt" in spec.initialize:
                     self._log("Prompt initialization not yet implemented")
                     pass
 
-        self.response_schema = mode.schema         
+        self.response_schema = spec.schema         
 
-        if hasattr(mode, 'after_attend_turn'):
+        if spec.after_attend_turn is not None:
             self._log("Calling after_attend_turn")
-            mode.after_attend_turn()
+            spec.after_attend_turn()
             
         # Store messages for potential rollback
-        self.messages_tentative = self.messages.copy()
+        self._rollback_messages()
         self._log("Mode setup completed")
@@ -17,7 +17,6 @@
 
 
 import threading
-import time
 from typing import Optional
 from services.manage_recording import AudioRecordingService
 from services.event_system import SpeechEvent
@@ -45,6 +44,7 @@ class InteractionService:
         self.manager.debug = debug  # Pass debug setting to manager
         self.is_running = False
         self.processing_thread = None
+        self._stop_event = threading.Event()
         
         # Set up event listeners
         self.recording_service = recording_service
@@ -75,9 +75,9 @@ class InteractionService:
     def _process_loop(self):
         """Main processing loop for interaction service."""
         try:
-            while self.is_running:
-                # Process any pending interactions
-                time.sleep(0.01)  # Small delay to prevent busy-waiting
+            # Interactions are handled by the recording service's event
+            # callbacks, so the thread just sleeps until stop() wakes it
+            self._stop_event.wait()
                 
         except Exception as e:
             self._log(f"Error in processing loop: {str(e)}")
@@ -87,6 +87,7 @@ class InteractionService:
         """Start the interaction service."""
         if not self.is_running:
             self.is_running = True
+            self._stop_event.clear()
             self._log("Starting interaction service")
             self.processing_thread = threading.Thread(target=self._process_loop)
             self.processing_thread.daemon = True
@@ -98,6 +99,7 @@ class InteractionService:
         if self.is_running:
             self._log("Stopping interaction service")
             self.is_running = False
+            self._stop_event.set()
             if self.processing_thread:
                 self.processing_thread.join()
             self._log("Interaction service stopped")
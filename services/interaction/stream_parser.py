@@ -0,0 +1,149 @@
+# This source code is a part of Attend. Attend is a voice assistant that uses
+# very expensive algorithms to direct your attention... however you damn well please.
+# Copyright (C) 2025 Scott Macdonell
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import re
+from typing import List, Optional
+from functions.streamtts import AssistantResponseExtractor, find_sentence_ends
+
+# Start of the "outputs" object in the streamed JSON response, capturing the response type
+_OUTPUTS_RE = re.compile(r'"outputs"\s*:\s*{\s*"(\w+)"')
+# Opening quote of the assistant_response string
+_ASSISTANT_START_RE = re.compile(r'"outputs"\s*:\s*{\s*"assistant_response"\s*:\s*"')
+# Both patterns start with this key; only text from its last occurrence on
+# can still become part of a match
+_OUTPUTS_KEY = '"outputs"'
+
+# How far back into already-scanned text a sentence end may start
+_SENTENCE_END_LOOKBACK = 8
+
+class StreamParser:
+    """
+    Incremental parser for a JSON response streamed from the LLM.
+
+    Each delta goes through feed(), which works out which output the
+    response carries and, for an assistant_response, returns the sentences
+    of the assistant's text as soon as each one is complete so they can be
+    sent to TTS while the rest of the response is still streaming.
+    """
+    __slots__ = ('response_type', 'started', 'ended', '_parts', '_assistant_parts',
+                 '_window', '_sentence_buf', '_text')
+
+    def __init__(self):
+        self.response_type: Optional[str] = None
+        self.started = False
+        self.ended = False
+        # Deltas are collected and joined on demand rather than concatenated
+        # on every delta, which would copy the whole response each time
+        self._parts: List[str] = []
+        self._assistant_parts: List[str] = []
+        # Tail of the response that the regexes still need to search
+        self._window = ""
+        # Assistant text not yet split into a complete sentence
+        self._sentence_buf = ""
+        # Decodes the JSON string of the assistant_response, escapes included
+        self._text = AssistantResponseExtractor()
+
+    @property
+    def response(self) -> str:
+        """The full response received so far."""
+        return "".join(self._parts)
+
+    @property
+    def assistant_response(self) -> str:
+        """The text of the assistant_response received so far."""
+        return "".join(self._assistant_parts)
+
+    def feed(self, content: str) -> List[str]:
+        """Add a delta of the response and return the sentences it completes."""
+        self._parts.append(content)
+        if self.ended:
+            return []
+
+        if not self.started:
+            window = self._window + content
+
+            # Work out what type of response we're getting
+            if self.response_type is None:
+                match = _OUTPUTS_RE.search(window)
+                if not match:
+                    self._window = self._unmatched_tail(window)
+                    return []
+                self.response_type = match.group(1)
+                window = window[match.start():]
+
+            # Only an assistant_response has text to speak
+            if self.response_type != "assistant_response":
+                self.ended = True
+                self._window = ""
+                return []
+
+            # Find where the text of the response starts; part of this delta
+            # may already be text
+            match = _ASSISTANT_START_RE.search(window)
+            if not match:
+                self._window = self._unmatched_tail(window)
+                return []
+            self.started = True
+            self._window = ""
+            content = window[match.end():]
+
+        # An unescaped quote closes the JSON string, so we've reached the end
+        content = self._text.decode(content)
+        self.ended = self._text.ended
+        self._assistant_parts.append(content)
+        return self.split_sentences(content, final=self.ended)
+
+    @staticmethod
+    def _unmatched_tail(window: str) -> str:
+        """
+        Return the part of a searched window that a later delta could still
+        complete into a match: everything from the last "outputs" key, or
+        if there is none, just enough characters to hold a partial key.
+        """
+        start = window.rfind(_OUTPUTS_KEY)
+        if start == -1:
+            return window[-(len(_OUTPUTS_KEY) - 1):]
+        return window[start:]
+
+    def close(self) -> List[str]:
+        """Return whatever assistant text is left once the stream has finished."""
+        self.ended = True
+        return self.split_sentences("", final=True)
+
+    def split_sentences(self, content: str, final: bool = False) -> List[str]:
+        """
+        Add assistant text and return the sentences it completes.
+
+        Only the newly added text (plus a few characters of lookback for a
+        terminator split across deltas) is scanned; see find_sentence_ends
+        for where a sentence ends. With final set, whatever remains is
+        returned as the last sentence.
+        """
+        pos = max(len(self._sentence_buf) - _SENTENCE_END_LOOKBACK, 0)
+        buf = self._sentence_buf + content
+        sentences = []
+        start = 0
+        for end, next_start in find_sentence_ends(buf, pos):
+            sentences.append(buf[start:end].strip())
+            start = next_start
+        buf = buf[start:]
+        if final:
+            if buf.strip():
+                sentences.append(buf.strip())
+            buf = ""
+        self._sentence_buf = buf
+        return sentences
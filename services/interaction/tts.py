@@ -15,16 +15,22 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import io
 from openai import OpenAI
 
 class TTSProcessor:
-    def __init__(self, config):
-        """Initialize TTS processor with configuration."""
+    def __init__(self, config, http_client=None):
+        """
+        Initialize TTS processor with configuration.
+
+        Args:
+            config (dict): Configuration containing the server-tts section
+            http_client (httpx.Client, optional): Client to share a connection pool with
+        """
         tts_config = config["server-tts"]
         self.client = OpenAI(
             api_key=tts_config["key"],
-            base_url=f"{tts_config['host']}:{tts_config['port']}/v1"
+            base_url=f"{tts_config['host']}:{tts_config['port']}/v1",
+            http_client=http_client
         )
         self.config = config
         self.debug = False
@@ -35,20 +41,33 @@ class TTSProcessor:
             print(f"[TTSProcessor] {message}")
 
     def process_tts(self, sentence: str) -> bytes:
-        """Process a sentence through TTS and return the audio data."""
+        """
+        Process a sentence through TTS and return the audio data.
+
+        The whole response body is drained with a single read(), so httpx
+        collects the chunks in its own loop and hands back one bytes object
+        instead of this thread going back and forth for every chunk.
+        """
         self._log(f"Processing TTS for sentence: {sentence}")
         try:
-            audio_data = io.BytesIO()
             with self.client.audio.speech.with_streaming_response.create(
                 model=self.config["server-tts"]["model"],
                 voice=self.config["server-tts"]["voice"],
                 response_format="pcm",
                 input=sentence,
             ) as response:
-                for chunk in response.iter_bytes(chunk_size=1024):
-                    audio_data.write(chunk)
+                audio_data = response.read()
             self._log("TTS processing completed successfully")
-            return audio_data.getvalue()
+            return audio_data
         except Exception as e:
             self._log(f"Error in TTS processing: {e}")
             return None
+
+    def warm_up(self):
+        """
+        Open the TTS server connection ahead of the first response by
+        synthesizing a single character and discarding the audio. Failures
+        are left for the first real request to surface.
+        """
+        self._log("Warming up TTS connection")
+        self.process_tts(".")
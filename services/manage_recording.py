@@ -18,29 +18,69 @@
 import yaml
 #import math
 import time
-import pyaudio
-import wave
+import struct
 import os
+import io
 import numpy as np
 import threading
-from collections import deque
-from typing import Callable
+import queue
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from typing import Callable, List, Optional
 from openai import OpenAI
 from silero_vad import load_silero_vad, VADIterator
-from .audio_device_manager import AudioDeviceManager
+from .audio_device_manager import AudioDeviceManager, audio_format
 from .event_system import EventEmitter, SpeechEvent
+from functions.audio_convert import s16_to_f32_norm
+
+@functools.lru_cache(maxsize=4)
+def _load_config(config_path):
+    """Load a configuration file, parsed once per path per process."""
+    # libyaml's C loader when PyYAML was built with it
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(config_path, 'rb') as file:
+        return yaml.load(file, Loader=loader)
+
+# Most transcriptions process_stt_batch sends to the STT server at once
+STT_BATCH_WORKERS = 4
+_stt_executor = ThreadPoolExecutor(max_workers=STT_BATCH_WORKERS, thread_name_prefix="stt-batch")
+
+# Canonical 44 byte header of a PCM WAV file
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+class PipelineState(IntEnum):
+    """State of the response pipeline started for a potential end of speech."""
+    NONE = 0
+    FALSE = 1
+    CONFIRMED = 2
+    CANCELLED = 3
+
+# States whose pipeline output should be thrown away
+DISCARDED_PIPELINE_STATES = frozenset((PipelineState.FALSE, PipelineState.CANCELLED))
 
 class RecordingManager:
+    """
+    Records from the input stream, runs VAD on it and tracks speech state.
+
+    Three threads are involved. PortAudio's callback thread hands chunks to
+    the recording thread, which only copies them into the ring buffer and
+    queues them for the VAD thread. The VAD thread runs Silero, whose
+    inference happens in ONNX Runtime or torch with the GIL released, and
+    emits speech events. Speech event listeners are called on the VAD thread
+    with the GIL held, so they must return quickly and hand any slow work,
+    such as STT, an LLM request or audio playback, to another thread.
+    NEW_TRANSCRIPTION is emitted from the thread that ran STT instead.
+    """
     def __init__(self, config_path, audio_manager: AudioDeviceManager):
-        with open(config_path, 'r') as file:
-            self.config = yaml.safe_load(file)
+        self.config = _load_config(config_path)
         
         # Initialize event emitter
         self.events = EventEmitter()
         
         # Audio configuration
         self.chunk = self.config['client']['audio']['chunk']
-        self.format = eval(self.config['client']['audio']['format'])
+        self.format = audio_format(self.config['client']['audio']['format'])
         self.channels = self.config['client']['audio']['channels']
         self.rate = self.config['client']['audio']['rate']
         self.buffer_seconds = self.config['client']['audio']['buffer_seconds']
@@ -48,20 +88,51 @@ class RecordingManager:
         self.speech_end_threshold = self.config['client']['audio']['speech_end_threshold']
 
         # Initialize audio recording components
-        self.buffer_size = int(self.rate / self.chunk * self.buffer_seconds)
-        self.audio_buffer = deque(maxlen=self.buffer_size)
-        self.chunk_times = deque(maxlen=self.buffer_size)  # Track timestamp of each chunk
-        self.buffer_lock = threading.Lock()  # Lock for thread-safe buffer access
+        # The buffer keeps buffer_seconds of audio: exactly _max_samples frames are kept
+        # for saving, in a ring of just enough whole chunks to hold them
+        self._max_samples = int(self.buffer_seconds * self.rate)
+        self.buffer_size = -(-self._max_samples // self.chunk)
+        # Ring buffer of the last buffer_size chunks, one chunk of int16 samples per row,
+        # with the timestamp of each chunk in the matching slot of _ring_times.
+        # The recording thread is the only writer: it fills slot _ring_written % buffer_size
+        # and only then advances _ring_written, so readers never need a lock, they just
+        # snapshot the counter and drop anything overwritten while they were copying
+        self._ring = np.zeros((self.buffer_size, self.chunk * self.channels), dtype=np.int16)
+        self._ring_times = np.zeros(self.buffer_size, dtype=np.float64)
+        self._ring_written = 0  # Total chunks written since start
+        # Byte views of each ring slot, so storing a chunk is a plain memcpy from the
+        # PyAudio bytes without building an int16 array around them first
+        self._ring_slots = [memoryview(row).cast('B') for row in self._ring]
+        # Chunks of audio kept before the detected start of speech when saving it
+        self._preroll_chunks = int((self.speech_end_threshold*self.rate)//self.chunk)
+
+        # Float32 buffer the VAD input is converted into, reused for every chunk
+        self._float_scratch = np.empty(self.chunk * self.channels, dtype=np.float32)
         
         # Use provided audio manager and get input stream
         self.audio_manager = audio_manager
+        # Bytes per sample and per frame of recorded audio, for the WAV header of saved speech
+        self._sample_width = self.audio_manager.get_sample_size(self.format)
+        self._frame_size = self._sample_width * self.channels
         self.stream = self.audio_manager.input_stream
         if not self.stream:
             raise ValueError("AudioDeviceManager must have an initialized input stream")
 
         # Initialize VAD components
-        self.model = load_silero_vad()
+        try:
+            # ONNX Runtime runs the single-window inference much faster than TorchScript,
+            # and silero's wrapper pins its session to one intra-op and one inter-op thread
+            self.model = load_silero_vad(onnx=True)
+        except ImportError:
+            self.model = load_silero_vad()
         self.vad_iterator = VADIterator(self.model, sampling_rate=self.rate)
+        # Silero's native window: 512 samples at 16 kHz, 256 at 8 kHz
+        self._vad_window = 512 if self.rate == 16000 else 256
+        # Samples waiting to fill a VAD window; room for one partial window plus a chunk
+        self._vad_accum = np.empty(self._vad_window + self.chunk * self.channels, dtype=np.float32)
+        self._vad_filled = 0
+        # Speech state machine handlers, see _build_state_table
+        self._state_table = self._build_state_table()
 
         # Speech state tracking
         self.speech_start_time = None
@@ -74,112 +145,300 @@ class RecordingManager:
 
         # Latest transcription storage
         self.latest_transcription = None
+        self._stt_client = None  # See _get_stt_client
 
         # Thread control
         self.is_recording = False
         self.recording_thread = None
+        self.vad_thread = None
+        # Recorded chunks waiting for VAD, as (data, timestamp); None tells the VAD thread to stop.
+        # It holds at most _VAD_BACKLOG_SECONDS of audio, see _queue_for_vad
+        self._vad_queue = queue.Queue(maxsize=max(1, int(self._VAD_BACKLOG_SECONDS * self.rate / self.chunk)))
+        self.vad_dropped_chunks = 0  # Chunks dropped because the VAD thread fell behind
 
         # Pipeline state tracking
         self.current_pipeline_id = None
-        self.pipeline_state = None  # None, 'false', 'confirmed', 'cancelled'
+        self.pipeline_state = PipelineState.NONE
         self.pipeline_processing = False
 
     def _continuous_recording(self):
-        """Background thread function for continuous audio recording and VAD processing."""
+        """Background thread function for continuous audio recording."""
+        self._raise_thread_priority()
+        # Everything the loop uses is bound to locals once; only the chunk counter and
+        # is_recording are read from self on each pass
+        stream = self.stream
+        # The input stream runs in callback mode, so chunks arrive from PortAudio's own
+        # thread and are only collected here
+        read_input = self.audio_manager.read_input
+        buffer_size = self.buffer_size
+        ring_slots = self._ring_slots
+        ring_times = self._ring_times
+        vad_put = self._queue_for_vad
+        now = time.time
+        chunk_bytes = len(ring_slots[0])
+        pending = b''  # Recorded bytes short of a whole ring row
         while self.is_recording:
             #print("Recording thread still running...") 
             try:
                 # Verify stream is still active
-                if not self.stream or not self.stream.is_active():
+                if not stream or not stream.is_active():
                     raise RuntimeError("Audio input stream is not active")
                     
-                data = self.stream.read(self.chunk, exception_on_overflow=False)
-                current_time = time.time()
-                
-                # Thread-safe buffer update
-                with self.buffer_lock:
-                    self.audio_buffer.append(data)
-                    self.chunk_times.append(current_time)
-
-                # Process audio chunk with VAD in the same thread
-                audio_np = np.frombuffer(data, dtype=np.int16)
-                audio_float32 = audio_np.astype(np.float32) / 32768.0
-
-                # Process with VAD
-                vad_result = self.vad_iterator(audio_float32, return_seconds=True)
-             #   print(f"VAD - Result: {vad_result}, Started: {self.speech_started}, Start Potential: {self.speech_start_potential}, End Potential: {self.speech_end_potential}")
-
-                ## VAD state machine logic
-                # Handle potential start
-                if isinstance(vad_result, dict) and 'start' in vad_result and not self.speech_started:
-                    self.speech_start_time = current_time
-                    self.speech_start_potential = True
-                    self.speech_end_potential = False
-                    self.events.emit(SpeechEvent.SPEECH_START_POTENTIAL)
-                    print(f"Pipeline state check - ID: {self.current_pipeline_id}, State: {self.pipeline_state}, Processing: {self.pipeline_processing}")
-                    # Only reset pipeline tracking if there isn't a confirmed pipeline still processing
-                    if not (self.current_pipeline_id and self.pipeline_state == 'confirmed' and self.pipeline_processing):
-                        self.current_pipeline_id = None
-                        self.pipeline_state = None
-                        self.pipeline_processing = False
-
-                #Speech Started
-                elif vad_result is None and self.speech_start_potential and not self.speech_started:
-                    if current_time - self.speech_start_time >= self.speech_start_threshold:
-                        self.speech_started = True
-                        self.speech_start_potential = False
-                        self.speech_detected = True
-                        self.events.emit(SpeechEvent.SPEECH_STARTED)
+                data = read_input(0.5)
+                if data is None:
+                    # Nothing recorded yet; check the stream and is_recording again
+                    continue
+                current_time = now()
                 
-                # Handle potential end
-                elif isinstance(vad_result, dict) and 'end' in vad_result and self.speech_started:
-                    if not self.speech_end_potential:
-                        self.speech_end_time = current_time
-                        self.speech_end_potential = True
-                        self.events.emit(SpeechEvent.SPEECH_END_POTENTIAL)
-                        
-                        ## Pipeline management
-                        # If there's a non-confirmed pipeline, cancel it
-                        # if self.current_pipeline_id and self.pipeline_state not in ['confirmed', None]:
-                        #     self.pipeline_state = 'cancelled'
-                        # TODO need to improve pipeline tracking just in case new speech ends before prior LLM responses finishes.
-                        self.current_pipeline_id = time.time()
-                        self.pipeline_state = None
-                        self.pipeline_processing = False
-
-                # Handle speech ended
-                elif vad_result is None and self.speech_started and self.speech_end_potential:
-                    if current_time - self.speech_end_time >= self.speech_end_threshold:
-                        self.speech_started = False
-                        self.speech_end_potential = False
-                        if self.current_pipeline_id:
-                            self.pipeline_state = 'confirmed'
-                        self.speech_ended = True
-                        self.events.emit(SpeechEvent.SPEECH_ENDED)
-
-                # Handle False Start
-                elif isinstance(vad_result, dict) and 'end' in vad_result and self.speech_start_potential and not self.speech_started:
-                    # False Start
-                    self.speech_start_potential = False
-                    self.speech_start_time = None
-                    self.events.emit(SpeechEvent.FALSE_START)
-
-                # Handle False End
-                elif isinstance(vad_result, dict) and 'start' in vad_result and self.speech_started and self.speech_end_potential:
-                    # False End
-                    self.speech_end_potential = False
-                    self.speech_end_time = None
-                    # If there's a non-confirmed pipeline mark it as false, cancel it
-                    if self.current_pipeline_id and not self.pipeline_state == 'confirmed':
-                        self.pipeline_state = 'false'
-                    self.events.emit(SpeechEvent.FALSE_END)
-
+                if len(data) == chunk_bytes and not pending:
+                    # Publish the chunk: fill the slot first, then advance the counter
+                    written = self._ring_written
+                    slot = written % buffer_size
+                    ring_slots[slot][:] = data
+                    ring_times[slot] = current_time
+                    self._ring_written = written + 1
+                else:
+                    # A chunk of another size is cut into whole ring rows; a partial
+                    # row waits for the next read
+                    pending = self._store_rows(pending + data, current_time)
+
+                # Hand the chunk to the VAD thread so a slow inference never delays the next read
+                vad_put((data, current_time))
 
             except Exception as e:
                 print(f"Error in recording thread: {str(e)}")
                 self.is_recording = False
                 break
 
+        # Wake the VAD thread so it can exit
+        vad_put(None)
+
+    # Longest backlog of recorded audio the VAD thread may fall behind by
+    _VAD_BACKLOG_SECONDS = 0.5
+
+    def _queue_for_vad(self, item):
+        """
+        Queue an item for the VAD thread, dropping the oldest chunk if the queue is full.
+
+        Speech events are timed by when each chunk was recorded, so a VAD thread
+        working through a growing backlog would report them later and later.
+        Dropping the oldest chunks keeps it on current audio instead.
+        """
+        vad_queue = self._vad_queue
+        while True:
+            try:
+                vad_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    vad_queue.get_nowait()
+                    self.vad_dropped_chunks += 1
+                except queue.Empty:
+                    # The VAD thread emptied the queue meanwhile
+                    pass
+
+    def _store_rows(self, data, current_time):
+        """Publish each whole ring row in data and return the bytes left over."""
+        row_bytes = len(self._ring_slots[0])
+        whole = len(data) - len(data) % row_bytes
+        for start in range(0, whole, row_bytes):
+            written = self._ring_written
+            slot = written % self.buffer_size
+            self._ring_slots[slot][:] = data[start:start + row_bytes]
+            self._ring_times[slot] = current_time
+            self._ring_written = written + 1
+        return data[whole:]
+
+    @staticmethod
+    def _raise_thread_priority():
+        """Give the calling thread real-time scheduling where the OS allows it."""
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(1))
+        except (AttributeError, OSError):
+            # Not Linux, or not permitted; keep the default priority
+            pass
+
+    def _vad_processing(self):
+        """Background thread function running VAD and the speech state machine on recorded chunks."""
+        vad_get = self._vad_queue.get
+        scratch = self._float_scratch
+        run_vad = self._run_vad
+        update_speech_state = self._update_speech_state
+        while True:
+            item = vad_get()
+            if item is None:
+                break
+            data, current_time = item
+            try:
+                # A chunk longer than configured gets a scratch buffer big enough to hold it;
+                # shorter ones only fill the front of the buffer
+                samples = len(data) // 2
+                if samples > scratch.size:
+                    scratch = self._float_scratch = np.empty(samples, dtype=np.float32)
+
+                # Scale int16 to [-1, 1) in a single pass straight into the scratch
+                # buffer, without the temporary arrays of astype() and division
+                audio_float32 = s16_to_f32_norm(data, scratch)
+
+                # Process with VAD, one model window at a time
+                for vad_result in run_vad(audio_float32):
+                    update_speech_state(vad_result, current_time)
+
+            except Exception as e:
+                print(f"Error in VAD thread: {str(e)}")
+                self.is_recording = False
+                break
+
+    def _run_vad(self, audio_float32):
+        """
+        Feed samples to the VAD and return its result for each complete model window.
+
+        Silero scores fixed windows of _vad_window samples, so chunks of any other
+        size are accumulated and the model runs once per full window. Leftover
+        samples are kept for the next chunk.
+        """
+        window = self._vad_window
+        filled = self._vad_filled
+        # Common case: a chunk is exactly one window, so run on it without copying
+        if filled == 0 and audio_float32.size == window:
+            return [self.vad_iterator(audio_float32, return_seconds=True)]
+
+        accum = self._vad_accum
+        if filled + audio_float32.size > accum.size:
+            # A chunk longer than configured; make room for it, keeping the partial window
+            grown = np.empty(window + audio_float32.size, dtype=np.float32)
+            grown[:filled] = accum[:filled]
+            accum = self._vad_accum = grown
+        accum[filled:filled + audio_float32.size] = audio_float32
+        filled += audio_float32.size
+
+        results = []
+        pos = 0
+        while filled - pos >= window:
+            results.append(self.vad_iterator(accum[pos:pos + window], return_seconds=True))
+            pos += window
+
+        # Move the partial window to the front for the next chunk
+        if pos:
+            accum[:filled - pos] = accum[pos:filled]
+            filled -= pos
+        self._vad_filled = filled
+        return results
+
+    # VAD result kinds, combined as bit flags: a result may report a start, an end, or both
+    _VAD_NONE = 0
+    _VAD_START = 1
+    _VAD_END = 2
+
+    def _build_state_table(self):
+        """
+        Build the speech state machine as a lookup table.
+
+        The table is indexed by kind << 3 | started << 2 | start_potential << 1
+        | end_potential and holds the handler for every combination of VAD result kind and speech state flags, worked out once
+        here from the rules in the Logic Flow Table below, so each VAD result
+        costs a single lookup instead of a chain of checks.
+        """
+        table = []
+        for kind in range(4):
+            has_start = bool(kind & self._VAD_START)
+            has_end = bool(kind & self._VAD_END)
+            for started in (False, True):
+                for start_potential in (False, True):
+                    for end_potential in (False, True):
+                        if has_start and not started:
+                            handler = self._on_potential_start
+                        elif kind == self._VAD_NONE and start_potential and not started:
+                            handler = self._on_start_continues
+                        elif has_end and started:
+                            # Only the first end of a segment marks a potential end
+                            handler = self._on_no_change if end_potential else self._on_potential_end
+                        elif kind == self._VAD_NONE and started and end_potential:
+                            handler = self._on_end_continues
+                        elif has_end and start_potential and not started:
+                            handler = self._on_false_start
+                        elif has_start and started and end_potential:
+                            handler = self._on_false_end
+                        else:
+                            handler = self._on_no_change
+                        table.append(handler)
+        return table
+
+    def _update_speech_state(self, vad_result, current_time):
+        """Advance the speech state machine with one VAD result."""
+        if vad_result is None:
+            kind = self._VAD_NONE
+        else:
+            kind = ('start' in vad_result) | ('end' in vad_result) << 1
+            if not kind:
+                return
+        self._state_table[kind << 3 | self.speech_started << 2
+                          | self.speech_start_potential << 1 | self.speech_end_potential](current_time)
+
+    def _on_no_change(self, current_time):
+        """Nothing to do; await the next significant event."""
+
+    def _on_potential_start(self, current_time):
+        """Speech was heard while not in a speech segment."""
+        self.speech_start_time = current_time
+        self.speech_start_potential = True
+        self.speech_end_potential = False
+        self.events.emit(SpeechEvent.SPEECH_START_POTENTIAL)
+        print(f"Pipeline state check - ID: {self.current_pipeline_id}, State: {self.pipeline_state.name}, Processing: {self.pipeline_processing}")
+        # Only reset pipeline tracking if there isn't a confirmed pipeline still processing
+        if not (self.current_pipeline_id and self.pipeline_state == PipelineState.CONFIRMED and self.pipeline_processing):
+            self.current_pipeline_id = None
+            self.pipeline_state = PipelineState.NONE
+            self.pipeline_processing = False
+
+    def _on_start_continues(self, current_time):
+        """Speech continues after a potential start; start the segment once it lasts long enough."""
+        if current_time - self.speech_start_time >= self.speech_start_threshold:
+            self.speech_started = True
+            self.speech_start_potential = False
+            self.speech_detected = True
+            self.events.emit(SpeechEvent.SPEECH_STARTED)
+
+    def _on_potential_end(self, current_time):
+        """Speech stopped within a speech segment."""
+        self.speech_end_time = current_time
+        self.speech_end_potential = True
+        self.events.emit(SpeechEvent.SPEECH_END_POTENTIAL)
+
+        ## Pipeline management
+        # If there's a non-confirmed pipeline, cancel it
+        # if self.current_pipeline_id and self.pipeline_state not in (PipelineState.CONFIRMED, PipelineState.NONE):
+        #     self.pipeline_state = PipelineState.CANCELLED
+        # TODO need to improve pipeline tracking just in case new speech ends before prior LLM responses finishes.
+        self.current_pipeline_id = time.time()
+        self.pipeline_state = PipelineState.NONE
+        self.pipeline_processing = False
+
+    def _on_end_continues(self, current_time):
+        """Silence continues after a potential end; end the segment once it lasts long enough."""
+        if current_time - self.speech_end_time >= self.speech_end_threshold:
+            self.speech_started = False
+            self.speech_end_potential = False
+            if self.current_pipeline_id:
+                self.pipeline_state = PipelineState.CONFIRMED
+            self.speech_ended = True
+            self.events.emit(SpeechEvent.SPEECH_ENDED)
+
+    def _on_false_start(self, current_time):
+        """Speech did not last long enough to start a speech segment."""
+        self.speech_start_potential = False
+        self.speech_start_time = None
+        self.events.emit(SpeechEvent.FALSE_START)
+
+    def _on_false_end(self, current_time):
+        """Speech resumed before the silence lasted long enough to end the segment."""
+        self.speech_end_potential = False
+        self.speech_end_time = None
+        # If there's a non-confirmed pipeline mark it as false, cancel it
+        if self.current_pipeline_id and not self.pipeline_state == PipelineState.CONFIRMED:
+            self.pipeline_state = PipelineState.FALSE
+        self.events.emit(SpeechEvent.FALSE_END)
+
     def start_recording(self):
         """Start the background recording thread."""
         if not self.stream or not self.stream.is_active():
@@ -187,6 +446,9 @@ class RecordingManager:
             
         if not self.is_recording:
             self.is_recording = True
+            self.vad_thread = threading.Thread(target=self._vad_processing)
+            self.vad_thread.daemon = True
+            self.vad_thread.start()
             self.recording_thread = threading.Thread(target=self._continuous_recording)
             self.recording_thread.daemon = True
             self.recording_thread.start()
@@ -197,13 +459,17 @@ class RecordingManager:
         if self.recording_thread:
             self.recording_thread.join()
             self.recording_thread = None
+        if self.vad_thread:
+            self.vad_thread.join()
+            self.vad_thread = None
 
     def get_latest_chunk(self):
         """Get the latest audio chunk and its timestamp from the buffer."""
-        with self.buffer_lock:
-            if len(self.audio_buffer) > 0:
-                return self.audio_buffer[-1], self.chunk_times[-1]
-            return None, None
+        written = self._ring_written
+        if written > 0:
+            last = (written - 1) % self.buffer_size
+            return self._ring[last].tobytes(), float(self._ring_times[last])
+        return None, None
 
     # Logic Flow Table:
     # | Flow                | vad_result                     | self.speech_start_potential | self.speech_started | self.speech_end_potential | Actions                                                                                                                                                                                         |
@@ -218,12 +484,13 @@ class RecordingManager:
     # | Blip before startup | {'start': time1, 'end': time2} | FALSE                       | FALSE               | FALSE                     | Nothing, await next significant event                                                                                                                                                           |
     # | Blip before end     | {'start': time1, 'end': time2} | FALSE                       | TRUE                | TRUE                      | Speech may be restarting. Give additional time to determine:<br>So, set self.speech_end_time = current_time                                                                                     |
 
-    def save_speech(self, filename="to-process-for-STT.wav"):
-        if not os.path.exists('temp'):
-            os.makedirs('temp')
-
-        file_path = os.path.join("temp", filename)
+    def _speech_segment(self):
+        """
+        Return the recorded int16 audio of the current speech segment.
 
+        The segment is never longer than _max_samples frames, so the cost of saving
+        speech is bounded by buffer_seconds however long the recorder has been running.
+        """
         # Mark pipeline as processing at start of save
         if self.current_pipeline_id:
             self.pipeline_processing = True
@@ -232,59 +499,132 @@ class RecordingManager:
         start_time = self.speech_start_time
         end_time = self.speech_end_time if self.speech_end_time else time.time()
 
-        # Thread-safe access to buffers
-        with self.buffer_lock:
-            # Convert chunk_times to list for easier indexing
-            chunk_times_list = list(self.chunk_times)
-            audio_buffer_list = list(self.audio_buffer)
-
-            # Find the indices that correspond to our speech segment
-            start_idx = 0
-            end_idx = len(chunk_times_list)
-
-            for i, chunk_time in enumerate(chunk_times_list):
-                if chunk_time >= start_time:
-                    start_idx = max(0, i - int((self.speech_end_threshold*self.rate)//self.chunk))  # Include all chunks within an end_threshold before
-                    break
-
-            for i, chunk_time in enumerate(chunk_times_list[start_idx:], start_idx):
-                if chunk_time > end_time:
-                    end_idx = min(len(chunk_times_list), i + 1)  # Include one chunk after for smooth transition
-                    break
+        # Snapshot the chunks written so far; the recording thread keeps writing meanwhile
+        written = self._ring_written
+        count = min(written, self.buffer_size)
+        # Slot of the oldest chunk; chunk i in time order is at (oldest + i) % buffer_size
+        oldest = (written - count) % self.buffer_size
+        chunk_times = np.roll(self._ring_times, -oldest)[:count]
+
+        # Find the indices that correspond to our speech segment
+        start_idx = 0
+        end_idx = count
+
+        first = int(np.searchsorted(chunk_times, start_time, side='left'))
+        if first < count:
+            start_idx = max(0, first - self._preroll_chunks)  # Include all chunks within an end_threshold before
+
+        after = int(np.searchsorted(chunk_times, end_time, side='right'))
+        if after < count:
+            end_idx = min(count, max(after, start_idx) + 1)  # Include one chunk after for smooth transition
+
+        # Extract only the audio data for our speech segment
+        slots = np.arange(oldest + start_idx, oldest + end_idx)
+        segment = np.take(self._ring, slots, axis=0, mode='wrap')
+
+        # Drop leading chunks the recording thread overwrote while we were copying
+        overwritten = self._ring_written - written - (self.buffer_size - count)
+        if overwritten > start_idx:
+            segment = segment[overwritten - start_idx:]
+
+        # Whole chunks can overshoot buffer_seconds by part of a chunk; trim the oldest samples
+        samples = segment.reshape(-1)
+        max_values = self._max_samples * self.channels
+        if samples.size > max_values:
+            samples = samples[-max_values:]
+        return samples
+
+    def _write_speech(self, target, segment):
+        """Write a speech segment as WAV to a file path or binary file object."""
+        header = _WAV_HEADER.pack(
+            b'RIFF', _WAV_HEADER.size - 8 + segment.nbytes, b'WAVE',
+            b'fmt ', 16, 1, self.channels, self.rate,
+            self.rate * self._frame_size, self._frame_size, self._sample_width * 8,
+            b'data', segment.nbytes)
+        # The segment is one C-contiguous int16 array, which write() takes as a
+        # buffer directly, so the samples are never copied into a bytes object
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, 'wb') as file:
+                file.write(header)
+                file.write(segment)
+        else:
+            target.write(header)
+            target.write(segment)
 
-            # Extract only the audio data for our speech segment
-            speech_data = audio_buffer_list[start_idx:end_idx]
-
-        wf = wave.open(file_path, 'wb')
-        wf.setnchannels(self.channels)
-        wf.setsampwidth(self.audio_manager.get_sample_size(self.format))
-        wf.setframerate(self.rate)
-        wf.writeframes(b''.join(speech_data))
-        wf.close()
+    def save_speech(self, filename="to-process-for-STT.wav"):
+        """Save the current speech segment as a WAV file in temp/ and return its path."""
+        if not os.path.exists('temp'):
+            os.makedirs('temp')
 
+        file_path = os.path.join("temp", filename)
+        self._write_speech(file_path, self._speech_segment())
         return file_path
 
-    def process_stt(self, audio_path):
-        host = self.config['server-stt']['host']
-        port = self.config['server-stt']['port']
-        key = self.config['server-stt']['key']
+    def save_speech_to_buffer(self):
+        """Return the current speech segment as WAV data in an in-memory buffer."""
+        buffer = io.BytesIO()
+        self._write_speech(buffer, self._speech_segment())
+        return buffer
+
+    def _get_stt_client(self):
+        """Return the STT client, created on first use and reused so its connections stay open."""
+        if self._stt_client is None:
+            host = self.config['server-stt']['host']
+            port = self.config['server-stt']['port']
+            key = self.config['server-stt']['key']
+            self._stt_client = OpenAI(api_key=key, base_url=f"{host}:{port}/v1/")
+        return self._stt_client
+
+    def _transcribe(self, audio):
+        """Send one WAV file path or buffer to the STT server and return its segments."""
         model = self.config['server-stt']['model']
-        base_url = f"{host}:{port}/v1/"
-        
-        try:
-            client = OpenAI(api_key=key, base_url=base_url)
-            with open(audio_path, "rb") as audio_file:
+        client = self._get_stt_client()
+        if isinstance(audio, io.BytesIO):
+            transcript = client.audio.transcriptions.create(
+                model=model,
+                file=("speech.wav", audio.getvalue(), "audio/wav")
+            )
+        else:
+            with open(audio, "rb") as audio_file:
                 transcript = client.audio.transcriptions.create(
                     model=model,
                     file=audio_file
                 )
-                self.latest_transcription = [{"start": 0, "end": 0, "text": transcript.text}]
-                self.events.emit(SpeechEvent.NEW_TRANSCRIPTION, self.latest_transcription)
-                return self.latest_transcription
+        return [{"start": 0, "end": 0, "text": transcript.text}]
+
+    def process_stt(self, audio):
+        """Transcribe speech from a WAV file path or a buffer from save_speech_to_buffer()."""
+        try:
+            self.latest_transcription = self._transcribe(audio)
+            self.events.emit(SpeechEvent.NEW_TRANSCRIPTION, self.latest_transcription)
+            return self.latest_transcription
         except Exception as e:
             print(f"Error communicating with STT server: {str(e)}")
             return None
 
+    def process_stt_batch(self, audios) -> List[Optional[List[dict]]]:
+        """
+        Transcribe several WAV file paths or buffers at once.
+
+        Up to STT_BATCH_WORKERS requests are in flight together on the shared
+        client. Results come back in input order, None for any that failed,
+        and are published as though process_stt had been called on each in turn.
+        """
+        self._get_stt_client()  # Create the client once, before the workers race for it
+        futures = [_stt_executor.submit(self._transcribe, audio) for audio in audios]
+        results = []
+        for future in futures:
+            try:
+                transcription = future.result()
+            except Exception as e:
+                print(f"Error communicating with STT server: {str(e)}")
+                results.append(None)
+                continue
+            self.latest_transcription = transcription
+            self.events.emit(SpeechEvent.NEW_TRANSCRIPTION, transcription)
+            results.append(transcription)
+        return results
+
     def get_speech_duration(self):
         if self.speech_start_time and self.speech_end_time:
             return self.speech_end_time - self.speech_start_time
@@ -338,8 +678,30 @@ class AudioRecordingService:
         self.debug = debug
         self.is_running = False
         self.previous_speech_detected = False
-        self.previous_speech_end_potential = False
         self.processing_thread = None
+        self.stt_thread = None
+
+        # Set by the speech events the processing loop acts on, so it sleeps until there's work
+        self._wake = threading.Event()
+        for event in (SpeechEvent.SPEECH_STARTED, SpeechEvent.SPEECH_ENDED):
+            self.manager.add_event_listener(event, self._wake_processing)
+
+        # A potential end of speech queues a transcription for the STT thread. One pending
+        # job is enough: it saves whatever the segment is when it runs. None stops the thread
+        self._stt_queue = queue.Queue(maxsize=1)
+        self.manager.add_event_listener(SpeechEvent.SPEECH_END_POTENTIAL, self._queue_transcription)
+
+    def _wake_processing(self, *args):
+        """Wake the processing loop to handle a change in speech state."""
+        self._wake.set()
+
+    def _queue_transcription(self, *args):
+        """Ask the STT thread to save and transcribe the current speech segment."""
+        try:
+            self._stt_queue.put_nowait(True)
+        except queue.Full:
+            # A transcription is already waiting and will pick up this segment
+            pass
 
     def _log(self, message):
         """Print debug messages if debug mode is enabled."""
@@ -350,34 +712,39 @@ class AudioRecordingService:
         """Main processing loop for audio recording and transcription."""
         try:
             while self.is_running:
+                # Sleep until a speech event arrives; the timeout is only a safety net
+                self._wake.wait(timeout=1.0)
+                self._wake.clear()
+
                 # Monitor speech detection states
                 if self.manager.speech_detected and not self.previous_speech_detected:
                     self._log("Speech detected!")
                 self.previous_speech_detected = self.manager.speech_detected
 
-                # Handle both potential ends and false ends
-                if (self.manager.speech_end_potential and not self.previous_speech_end_potential):
-                    self._log("Speech segment potentially ended. Starting processing...")
-                    pipeline_id = self.manager.current_pipeline_id
-                    audio_path = self.manager.save_speech()
-
-                    # Only process if pipeline hasn't been cancelled/marked false
-                    if self.manager.pipeline_state not in ['cancelled', 'false']:
-                        transcription = self.manager.process_stt(audio_path)
-                        self._log(f"Transcription complete for pipeline {pipeline_id}")
-                    
-                self.previous_speech_end_potential = self.manager.speech_end_potential
-
                 if self.manager.speech_ended:
                     self._log("Speech ended. Resetting state machine...")
                     self.manager.reset()
 
-                time.sleep(0.01)  # Small delay to prevent busy-waiting
-
         except Exception as e:
             self._log(f"Error in processing loop: {str(e)}")
             self.stop()
 
+    def _stt_loop(self):
+        """Save and transcribe speech each time a potential end of speech is queued."""
+        while self._stt_queue.get() is not None:
+            try:
+                self._log("Speech segment potentially ended. Starting processing...")
+                pipeline_id = self.manager.current_pipeline_id
+                # Kept in memory; STT is sent the WAV data without a trip through the disk
+                speech_audio = self.manager.save_speech_to_buffer()
+
+                # Only process if pipeline hasn't been cancelled/marked false
+                if self.manager.pipeline_state not in DISCARDED_PIPELINE_STATES:
+                    self.manager.process_stt(speech_audio)
+                    self._log(f"Transcription complete for pipeline {pipeline_id}")
+            except Exception as e:
+                self._log(f"Error in STT thread: {str(e)}")
+
     def start(self):
         """Start the audio recording service."""
         if not self.is_running:
@@ -387,13 +754,21 @@ class AudioRecordingService:
             self.processing_thread = threading.Thread(target=self._process_loop)
             self.processing_thread.daemon = True
             self.processing_thread.start()
+            self.stt_thread = threading.Thread(target=self._stt_loop)
+            self.stt_thread.daemon = True
+            self.stt_thread.start()
 
     def stop(self):
         """Stop the audio recording service."""
         if self.is_running:
             self.is_running = False
+            self._wake.set()
             if self.processing_thread:
                 self.processing_thread.join()
+            if self.stt_thread:
+                self._stt_queue.put(None)
+                self.stt_thread.join()
+                self.stt_thread = None
             self.manager.close()
             self._log("Audio recording service stopped")
 
@@ -32,7 +32,17 @@ project_root = str(Path(__file__).parent.parent.parent)
 if project_root not in sys.path:
     sys.path.append(project_root)
 
-from functions.streamtts import load_tts_config, stream_text, stream_streaming_text
+import functions.streamtts as streamtts
+from functions.streamtts import load_tts_config, stream_text, stream_streaming_text, split_sentences, stream_text_segmented, stream_text_stream, stream_text_cached, AssistantResponseExtractor, _ChunkQueue
+
+@pytest.fixture(autouse=True)
+def reset_tts_caches():
+    """Clear the cached config and client so each test sees its own patched config."""
+    load_tts_config.cache_clear()
+    streamtts._client = None
+    yield
+    load_tts_config.cache_clear()
+    streamtts._client = None
 
 @pytest.fixture
 def mock_config():
@@ -40,7 +50,7 @@ def mock_config():
     return {
         "server-tts": {
             "key": "test-key",
-            "host": "localhost",
+            "host": "http://localhost",  # The config's host includes the scheme
             "port": "8000",
             "model": "test-model",
             "voice": "test-voice",
@@ -99,12 +109,13 @@ def test_load_tts_config(mock_config):
     with patch('builtins.open', mock_file):
         config = load_tts_config()
         
-        assert config['api_key'] == 'test-key'
-        assert config['api_base'] == 'http://localhost:8000/v1'
-        assert config['model'] == 'test-model'
-        assert config['default_voice'] == 'test-voice'
-        assert config['default_speed'] == 1.0
-        assert config['intersentence_pause'] == 0.1
+        assert config.api_key == 'test-key'
+        assert config.api_base == 'http://localhost:8000/v1'
+        assert config.model == 'test-model'
+        assert config.default_voice == 'test-voice'
+        assert config.default_speed == 1.0
+        assert config.intersentence_pause == 0.1
+        assert config.silence == bytes(int(24000 * 0.1) * 2)
 
 def test_stream_text_success(mock_audio_manager, mock_openai_response, mock_config):
     """Test successful text-to-speech streaming."""
@@ -126,45 +137,185 @@ def test_stream_text_success(mock_audio_manager, mock_openai_response, mock_conf
         )
         
         # Verify OpenAI client was configured correctly
-        mock_openai.assert_called_once_with(
-            api_key='test-key',
-            base_url='http://localhost:8000/v1'
-        )
+        mock_openai.assert_called_once()
+        assert mock_openai.call_args.kwargs['api_key'] == 'test-key'
+        assert mock_openai.call_args.kwargs['base_url'] == 'http://localhost:8000/v1'
         
-        # Verify audio streaming
-        assert mock_audio_manager.output_stream.write.call_count == 2
+        # Verify audio streaming (short audio is flushed from the pre-roll buffer)
+        written = b''.join(c.args[0] for c in mock_audio_manager.output_stream.write.call_args_list)
+        assert written == b'chunk1chunk2'
         assert 'time_to_first_byte' in timing
         assert 'total_duration' in timing
 
-def test_stream_text_inactive_stream(mock_audio_manager, mock_config):
-    """Test stream_text with inactive audio stream."""
-    mock_audio_manager.output_stream.is_active.return_value = False
-    
-    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))):
-        with pytest.raises(RuntimeError, match="Audio output stream is not active"):
-            stream_text("Test text", mock_audio_manager)
+def test_stream_text_uses_given_client(mock_audio_manager, mock_openai_response, mock_config):
+    """Test that a client passed in is used instead of creating the shared one."""
+    client = Mock()
+    client.audio.speech.with_streaming_response.create.return_value = mock_openai_response
+    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
+         patch('openai.OpenAI') as mock_openai:
+        stream_text("Test text", mock_audio_manager, client=client)
 
-def test_stream_text_no_output_stream(mock_config):
-    """Test stream_text with no output stream configured."""
-    mock_audio_manager = Mock()
-    mock_audio_manager.output_stream = None
-    
+        mock_openai.assert_not_called()
+        client.audio.speech.with_streaming_response.create.assert_called_once()
+
+def test_stream_text_cached(mock_audio_manager, mock_openai_response, mock_config, tmp_path, monkeypatch):
+    """Test that fixed text is synthesized once and replayed from the disk cache."""
+    monkeypatch.setattr(streamtts, 'TTS_CACHE_DIR', str(tmp_path))
     with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))):
-        with pytest.raises(ValueError, match="AudioDeviceManager must have an initialized output stream"):
-            stream_text("Test text", mock_audio_manager)
+        load_tts_config()
+
+    with patch('openai.OpenAI') as mock_openai:
+        mock_client = Mock()
+        mock_client.audio.speech.with_streaming_response.create.return_value = mock_openai_response
+        mock_openai.return_value = mock_client
+
+        stream_text_cached("Hello there.", mock_audio_manager)
+        timing = stream_text_cached("Hello there.", mock_audio_manager)
+
+        assert mock_client.audio.speech.with_streaming_response.create.call_count == 1
+        written = b''.join(c.args[0] for c in mock_audio_manager.output_stream.write.call_args_list)
+        assert written == b'chunk1chunk2' * 2
+        assert 'total_duration' in timing
+
+def test_split_sentences():
+    """Test splitting text on sentence boundaries."""
+    assert split_sentences("Hello there! How are you? I am fine.") == [
+        "Hello there!", "How are you?", "I am fine."
+    ]
+    assert split_sentences("No terminal punctuation") == ["No terminal punctuation"]
+    assert split_sentences('He said "hi." Then (he left!) Bye') == ['He said "hi."', "Then (he left!)", "Bye"]
+    assert split_sentences("   ") == []
+
+def test_split_sentences_skips_abbreviations():
+    """Test that a period after a title or abbreviation doesn't end the sentence."""
+    assert split_sentences("Dr. Smith is in. See Mrs. Jones at 3 p.m. today, e.g. now.") == [
+        "Dr. Smith is in.", "See Mrs. Jones at 3 p.m. today, e.g. now."
+    ]
+    # Only whole words count: "Ferdr." is not "Dr."
+    assert split_sentences("Call Ferdr. Now") == ["Call Ferdr.", "Now"]
+
+def test_stream_text_segmented_success(mock_audio_manager, mock_openai_response, mock_config):
+    """Test that each sentence is synthesized separately with a pause in between."""
+    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
+         patch('openai.OpenAI') as mock_openai:
+
+        mock_client = Mock()
+        mock_client.audio.speech.with_streaming_response.create.return_value = mock_openai_response
+        mock_openai.return_value = mock_client
+
+        timing = stream_text_segmented("First sentence. Second sentence.", mock_audio_manager)
+
+        # Sentences are synthesized concurrently, so requests may start in any order
+        create = mock_client.audio.speech.with_streaming_response.create
+        assert create.call_count == 2
+        assert sorted(c.kwargs['input'] for c in create.call_args_list) == ["First sentence.", "Second sentence."]
+
+        # Two chunks per sentence plus one pause between them
+        written = b''.join(c.args[0] for c in mock_audio_manager.output_stream.write.call_args_list)
+        pause = b'\x00' * (int(24000 * 0.1) * 2)
+        assert written == b'chunk1chunk2' + pause + b'chunk1chunk2'
+        assert 'time_to_first_byte' in timing
+        assert 'total_duration' in timing
+
+def test_stream_text_segmented_plays_in_sentence_order(mock_audio_manager, mock_config):
+    """Test that a later sentence finishing synthesis first is still played after the earlier one."""
+    first_started = threading.Event()
+    second_done = threading.Event()
+
+    def respond(**kwargs):
+        response = MagicMock()
+        response.__enter__.return_value = response
+        if kwargs['input'] == "First sentence.":
+            def first_chunks():
+                first_started.set()
+                second_done.wait(1)
+                yield b'first'
+            response.iter_bytes.side_effect = first_chunks
+        else:
+            def second_chunks():
+                first_started.wait(1)
+                yield b'second'
+                second_done.set()
+            response.iter_bytes.side_effect = second_chunks
+        return response
+
+    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
+         patch('openai.OpenAI') as mock_openai:
+
+        mock_client = Mock()
+        mock_client.audio.speech.with_streaming_response.create.side_effect = respond
+        mock_openai.return_value = mock_client
+
+        stream_text_segmented("First sentence. Second sentence.", mock_audio_manager)
+
+        written = b''.join(c.args[0] for c in mock_audio_manager.output_stream.write.call_args_list)
+        pause = b'\x00' * (int(24000 * 0.1) * 2)
+        assert second_done.is_set()
+        assert written == b'first' + pause + b'second'
+
+def test_stream_text_segmented_playback_error_with_stalled_sentence(mock_audio_manager, mock_config):
+    """Test that a playback error is raised even while a sentence request is stalled."""
+    release = threading.Event()
+
+    def respond(**kwargs):
+        response = MagicMock()
+        response.__enter__.return_value = response
+        def stalled_chunks():
+            yield bytes(16384)  # Past the preroll, so playback starts
+            release.wait(5)
+        response.iter_bytes.side_effect = stalled_chunks
+        return response
+
+    mock_audio_manager.output_stream.write.side_effect = OSError("device gone")
+    errors = []
+
+    def run():
+        try:
+            stream_text_segmented("First sentence.", mock_audio_manager)
+        except Exception as e:
+            errors.append(e)
+
+    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
+         patch('openai.OpenAI') as mock_openai:
+
+        mock_client = Mock()
+        mock_client.audio.speech.with_streaming_response.create.side_effect = respond
+        mock_openai.return_value = mock_client
+
+        caller = threading.Thread(target=run)
+        caller.start()
+        caller.join(2)
+        stalled = caller.is_alive()
+        release.set()
+        caller.join()
+
+    assert not stalled
+    assert isinstance(errors[0], RuntimeError)
+
+def test_stream_text_stream_success(mock_audio_manager, mock_openai_response, mock_config):
+    """Test that sentences are cut from text deltas as they complete."""
+    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
+         patch('openai.OpenAI') as mock_openai:
+
+        mock_client = Mock()
+        mock_client.audio.speech.with_streaming_response.create.return_value = mock_openai_response
+        mock_openai.return_value = mock_client
+
+        deltas = iter(["First sen", "tence. Sec", "ond sentence", " without an end"])
+        timing = stream_text_stream(deltas, mock_audio_manager)
+
+        create = mock_client.audio.speech.with_streaming_response.create
+        assert [c.kwargs['input'] for c in create.call_args_list] == [
+            "First sentence.", "Second sentence without an end"
+        ]
+        assert 'time_to_first_byte' in timing
+        assert 'total_duration' in timing
 
 def test_stream_streaming_text_success(mock_audio_manager, mock_streaming_response, mock_config, mock_openai_response):
     """Test successful streaming text-to-speech from chat completion."""
     with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
          patch('openai.OpenAI') as mock_openai, \
-         patch('time.sleep'), \
-         patch('nltk.sent_tokenize', return_value=["This is sentence one.", "This is sentence two."]), \
-         patch('queue.Queue') as mock_queue_class:
-        
-        # Configure mock queues
-        mock_sentence_queue = MagicMock()
-        mock_audio_queue = MagicMock()
-        mock_queue_class.side_effect = [mock_sentence_queue, mock_audio_queue]
+         patch('time.sleep'):
         
         # Configure mock OpenAI client
         mock_client = Mock()
@@ -181,32 +332,18 @@ def test_stream_streaming_text_success(mock_audio_manager, mock_streaming_respon
         )
         
         # Verify OpenAI client was configured correctly
-        mock_openai.assert_called_with(
-            api_key='test-key',
-            base_url='http://localhost:8000/v1'
-        )
+        mock_openai.assert_called_once()
+        assert mock_openai.call_args.kwargs['api_key'] == 'test-key'
+        assert mock_openai.call_args.kwargs['base_url'] == 'http://localhost:8000/v1'
+        
+        # Only the first response's text is spoken
+        mock_client.audio.speech.with_streaming_response.create.assert_called_once()
+        assert mock_client.audio.speech.with_streaming_response.create.call_args.kwargs['input'] == "This is sentence one."
         
         # Verify timing information is returned
         assert 'time_to_first_byte' in timing
         assert 'total_duration' in timing
 
-def test_stream_streaming_text_inactive_stream(mock_audio_manager, mock_streaming_response, mock_config):
-    """Test stream_streaming_text with inactive audio stream."""
-    mock_audio_manager.output_stream.is_active.return_value = False
-    
-    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))):
-        with pytest.raises(RuntimeError, match="Audio output stream is not active"):
-            stream_streaming_text(mock_streaming_response, mock_audio_manager)
-
-def test_stream_streaming_text_no_output_stream(mock_streaming_response, mock_config):
-    """Test stream_streaming_text with no output stream configured."""
-    mock_audio_manager = Mock()
-    mock_audio_manager.output_stream = None
-    
-    with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))):
-        with pytest.raises(ValueError, match="AudioDeviceManager must have an initialized output stream"):
-            stream_streaming_text(mock_streaming_response, mock_audio_manager)
-
 def test_stream_streaming_text_invalid_json(mock_audio_manager, mock_config, mock_openai_response):
     """Test stream_streaming_text with invalid JSON in response."""
     class MockDelta:
@@ -229,14 +366,7 @@ def test_stream_streaming_text_invalid_json(mock_audio_manager, mock_config, moc
     
     with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
          patch('openai.OpenAI') as mock_openai, \
-         patch('time.sleep'), \
-         patch('nltk.sent_tokenize', return_value=[]), \
-         patch('queue.Queue') as mock_queue_class:
-        
-        # Configure mock queues that complete immediately
-        mock_sentence_queue = queue.Queue()
-        mock_audio_queue = queue.Queue()
-        mock_queue_class.side_effect = [mock_sentence_queue, mock_audio_queue]
+         patch('time.sleep'):
         
         # Configure mock OpenAI client
         mock_client = Mock()
@@ -257,14 +387,7 @@ def test_stream_streaming_text_tts_error(mock_audio_manager, mock_streaming_resp
     """Test stream_streaming_text handling TTS API errors."""
     with patch('builtins.open', mock_open(read_data=yaml.dump(mock_config))), \
          patch('openai.OpenAI') as mock_openai, \
-         patch('time.sleep'), \
-         patch('nltk.sent_tokenize', return_value=["This is sentence one.", "This is sentence two."]), \
-         patch('queue.Queue') as mock_queue_class:
-        
-        # Configure mock queues that complete immediately
-        mock_sentence_queue = queue.Queue()
-        mock_audio_queue = queue.Queue()
-        mock_queue_class.side_effect = [mock_sentence_queue, mock_audio_queue]
+         patch('time.sleep'):
         
         # Configure mock OpenAI client to raise an exception
         mock_client = Mock()
@@ -280,3 +403,33 @@ def test_stream_streaming_text_tts_error(mock_audio_manager, mock_streaming_resp
         # Verify timing information is returned
         assert 'time_to_first_byte' in timing
         assert 'total_duration' in timing
+
+def test_assistant_response_extractor_incremental():
+    """Test that only newly decoded text is returned as the JSON streams in."""
+    extractor = AssistantResponseExtractor()
+    assert extractor.feed('{"assistant_') == ""
+    assert extractor.feed('response": "Hel') == "Hel"
+    assert extractor.feed('lo.') == "lo."
+    assert extractor.feed('"}') == ""
+    assert extractor.ended
+    assert extractor.feed(' ignored') == ""
+
+def test_assistant_response_extractor_escapes():
+    """Test that escapes are decoded even when split across deltas."""
+    extractor = AssistantResponseExtractor()
+    deltas = ['{"assistant_response": "A \\', '"quote\\" \\u00', 'e9 \\ud83d', '\\ude00\\\\n"}']
+    assert "".join(extractor.feed(d) for d in deltas) == 'A "quote" \u00e9 \U0001f600\\n'
+    assert extractor.ended
+
+def test_chunk_queue_hands_over_in_order():
+    """Test that a producer blocked on a full queue resumes as the consumer drains it."""
+    chunks = _ChunkQueue(2)
+    producer = threading.Thread(target=lambda: [chunks.put(i) for i in list(range(100)) + [None]])
+    producer.start()
+    received = []
+    while (item := chunks.get(timeout=1)) is not None:
+        received.append(item)
+    producer.join()
+    assert received == list(range(100))
+    with pytest.raises(queue.Empty):
+        chunks.get(timeout=0.01)
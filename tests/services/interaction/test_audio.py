@@ -19,12 +19,13 @@
 import io
 import pytest
 from unittest.mock import Mock, MagicMock
-from threading import Lock, Event
-from services.interaction.audio import AudioProcessor
+from threading import Event
+from services.interaction.audio import AudioProcessor, SpscRing
 
 @pytest.fixture
 def audio_device_manager():
     manager = Mock()
+    manager.output_stream = None
     output_stream = Mock()
     output_stream.is_active.return_value = True
     output_stream.write = Mock()
@@ -33,9 +34,7 @@ def audio_device_manager():
 
 @pytest.fixture
 def audio_processor(audio_device_manager):
-    processor = AudioProcessor(audio_device_manager)
-    processor.queue_lock = Lock()
-    return processor
+    return AudioProcessor(audio_device_manager)
 
 @pytest.fixture
 def playback_complete():
@@ -60,8 +59,19 @@ def test_ensure_output_stream_reuses_active_stream(audio_processor, audio_device
     assert stream == existing_stream
     audio_device_manager.create_output_stream.assert_not_called()
 
-def test_play_audio_now_writes_chunks(audio_processor, playback_complete):
-    """Test that play_audio_now correctly writes audio data in chunks."""
+def test_ensure_output_stream_reuses_manager_stream(audio_processor, audio_device_manager):
+    """Test that _ensure_output_stream uses the device manager's active stream."""
+    manager_stream = Mock()
+    manager_stream.is_active.return_value = True
+    audio_device_manager.output_stream = manager_stream
+
+    stream = audio_processor._ensure_output_stream()
+
+    assert stream == manager_stream
+    audio_device_manager.create_output_stream.assert_not_called()
+
+def test_play_audio_now_writes_audio(audio_processor, playback_complete):
+    """Test that play_audio_now writes the audio data to the stream in one call."""
     test_data = b"test" * 1024  # 4KB of test data
     # Set event before playing to avoid initial wait
     playback_complete.set()
@@ -69,8 +79,7 @@ def test_play_audio_now_writes_chunks(audio_processor, playback_complete):
     
     # Verify the stream wrote the data
     stream = audio_processor._output_stream
-    total_writes = stream.write.call_count
-    assert total_writes > 0
+    stream.write.assert_called_once_with(test_data)
 
 def test_play_audio_now_handles_errors(audio_processor, audio_device_manager, playback_complete):
     """Test that play_audio_now handles errors gracefully."""
@@ -83,9 +92,11 @@ def test_play_audio_now_handles_errors(audio_processor, audio_device_manager, pl
     playback_complete.set()
     audio_processor.play_audio_now(test_data, playback_complete)
     
-    # Verify stream was closed and cleared
-    audio_device_manager.close_stream.assert_called_once_with('output')
-    assert audio_processor._output_stream is None
+    # Verify stream was restarted rather than closed
+    stream.stop_stream.assert_called_once()
+    stream.start_stream.assert_called_once()
+    audio_device_manager.close_stream.assert_not_called()
+    assert audio_processor._output_stream is stream
 
 def test_queue_audio_adds_to_queue(audio_processor):
     """Test that queue_audio adds audio data to the queue."""
@@ -110,9 +121,80 @@ def test_play_queued_audio_plays_all_queued(audio_processor, playback_complete):
     # Verify queue is empty after playing
     assert len(audio_processor.queued_audio) == 0
     
-    # Verify stream wrote data
+    # Verify the queued audio was played as a single buffer
     stream = audio_processor._output_stream
-    assert stream.write.call_count > 0
+    stream.write.assert_called_once_with(test_data1 + test_data2)
+
+def test_clear_queued_audio_drops_pending(audio_processor):
+    """Test that clear_queued_audio discards audio that hasn't played."""
+    audio_processor.queue_audio(b"test1")
+    audio_processor.queue_audio(b"test2")
+    
+    audio_processor.clear_queued_audio()
+    
+    assert audio_processor.queued_audio == []
+    audio_processor.queue_audio(b"test3")
+    assert audio_processor.queued_audio == [b"test3"]
+
+def test_spsc_ring_wraps_and_reports_full():
+    """Test that the ring keeps FIFO order across wraparound and rejects pushes when full."""
+    ring = SpscRing(capacity=3)
+    
+    assert [ring.try_push(bytes([i])) for i in range(5)] == [True, True, True, True, False]
+    assert ring.try_pop() == bytes([0])
+    assert ring.try_push(bytes([4]))
+    assert [ring.try_pop() for _ in range(5)] == [bytes([1]), bytes([2]), bytes([3]), bytes([4]), None]
+
+def test_spsc_ring_clear_is_applied_by_consumer():
+    """Test that a clear takes effect at once and its buffers are released on the next pop."""
+    ring = SpscRing(capacity=4)
+    ring.try_push(b"a")
+    ring.try_push(b"b")
+    
+    ring.clear()
+    ring.try_push(b"c")
+    
+    assert len(ring) == 1
+    assert ring.snapshot() == [b"c"]
+    assert ring.try_pop() == b"c"
+    assert ring.try_pop() is None
+    assert ring._slots == [None] * 4
+
+def test_request_playback_plays_on_playback_thread(audio_processor, playback_complete):
+    """Test that queued audio is played by the playback thread and then() runs after it."""
+    import threading
+    played_on = []
+    audio_processor.queue_audio(b"test1")
+    audio_processor.queue_audio(b"test2")
+    playback_complete.set()
+    
+    done = audio_processor.request_playback(
+        playback_complete, then=lambda: played_on.append(threading.current_thread().name))
+    
+    assert done.wait(1)
+    assert played_on == ["audio-playback"]
+    audio_processor._output_stream.write.assert_called_once_with(b"test1test2")
+
+def test_concurrent_playback_requests_play_each_chunk_once(audio_processor, playback_complete):
+    """Test that playback requested from several threads never repeats or skips audio."""
+    import threading
+    playback_complete.set()
+    chunks = [bytes([i]) for i in range(40)]
+    
+    def request():
+        audio_processor.request_playback(playback_complete).wait()
+    
+    threads = []
+    for chunk in chunks:
+        audio_processor.queue_audio(chunk)
+        thread = threading.Thread(target=request)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    
+    written = b"".join(c.args[0] for c in audio_processor._output_stream.write.call_args_list)
+    assert written == b"".join(chunks)
 
 def test_cleanup_closes_stream(audio_processor, audio_device_manager):
     """Test that cleanup properly closes and clears the output stream."""
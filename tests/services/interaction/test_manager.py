@@ -120,22 +120,34 @@ def test_handle_false_end(interaction_manager):
     # Setup initial state
     interaction_manager.in_potential_end_state = True
     interaction_manager.current_pipeline = "test_pipeline"
-    interaction_manager.audio_processor.queued_audio = ["test_audio"]
     
     interaction_manager._handle_false_end()
     
     assert interaction_manager.in_potential_end_state == False
     assert interaction_manager.current_pipeline is None
-    assert interaction_manager.audio_processor.queued_audio == []
+    interaction_manager.audio_processor.clear_queued_audio.assert_called_once()
 
 def test_handle_speech_ended(interaction_manager):
     """Test handling of confirmed speech end."""
     interaction_manager._handle_speech_ended()
     
     assert interaction_manager.speech_ended.is_set()
-    interaction_manager.audio_processor.play_queued_audio.assert_called_once_with(
-        interaction_manager.playback_complete
-    )
+    request_playback = interaction_manager.audio_processor.request_playback
+    request_playback.assert_called_once()
+    assert request_playback.call_args.args == (interaction_manager.playback_complete,)
+
+def test_handle_speech_ended_parses_after_playback(interaction_manager):
+    """Test that the committed response is parsed by the playback thread, not the VAD thread."""
+    interaction_manager.current_response = '{"outputs": {"assistant_response": "Hi."}}'
+    
+    with patch.object(interaction_manager, 'parse_accumulated_response') as mock_parse:
+        interaction_manager._handle_speech_ended()
+        
+        mock_parse.assert_not_called()
+        assert interaction_manager.current_response == ""
+        # What the playback thread runs once the queued audio has played
+        interaction_manager.audio_processor.request_playback.call_args.kwargs["then"]()
+        mock_parse.assert_called_once_with('{"outputs": {"assistant_response": "Hi."}}')
 
 def test_handle_transcription_empty(interaction_manager):
     """Test handling of empty transcription."""
@@ -188,13 +200,14 @@ def test_set_mode_with_initialization(interaction_manager):
     }
     mock_mode.system_prompt = "System prompt"
     
-    with patch('services.interaction.manager.stream_text') as mock_stream:
+    with patch('services.interaction.manager.stream_text_cached') as mock_stream:
         interaction_manager.set_mode(mock_mode)
         
         mock_stream.assert_called_once_with(
             text="Hello!",
             audio_manager=interaction_manager.audio_device_manager,
-            speed=1.0
+            speed=1.0,
+            client=interaction_manager.tts_processor.client
         )
         
         assert interaction_manager.messages == [
@@ -305,25 +318,26 @@ def test_handle_transcription_json_error(interaction_manager, mock_openai):
 
 def test_handle_transcription_sentence_processing(interaction_manager, mock_openai):
     """Test sentence processing in transcription handling."""
-    # Mock LLM response with multiple sentences
-    mock_chunk = Mock()
-    mock_choice = Mock()
-    mock_delta = Mock()
-    mock_delta.content = '{"assistant_response": "Hello! How are you?"}'
-    mock_choice.delta = mock_delta
-    mock_chunk.choices = [mock_choice]
-    
-    mock_openai.return_value.chat.completions.create.return_value = [mock_chunk]
-    
-    with patch('nltk.sent_tokenize') as mock_tokenize:
-        mock_tokenize.return_value = ["Hello!", "How are you?"]
-        
-        interaction_manager._handle_transcription([{"text": "Hi"}])
-        
-        # Verify TTS was called for each sentence
-        assert interaction_manager.tts_processor.process_tts.call_count == 2
-        interaction_manager.tts_processor.process_tts.assert_any_call("Hello!")
-        interaction_manager.tts_processor.process_tts.assert_any_call("How are you?")
+    # Mock LLM response streamed over several chunks with multiple sentences
+    deltas = ['{"outputs": {"assistant_response', '": ', '"', 'Hello! How', ' are you?', '"}}']
+    chunks = []
+    for delta in deltas:
+        mock_chunk = Mock()
+        mock_choice = Mock()
+        mock_choice.delta = Mock(content=delta)
+        mock_chunk.choices = [mock_choice]
+        chunks.append(mock_chunk)
+    
+    mock_openai.return_value.chat.completions.create.return_value = chunks
+    interaction_manager.response_schema = {}
+    interaction_manager.recording_service.manager = Mock(pipeline_state=None)
+    
+    interaction_manager._handle_transcription([{"text": "Hi"}])
+    
+    # Verify TTS was called for each sentence
+    assert interaction_manager.tts_processor.process_tts.call_count == 2
+    interaction_manager.tts_processor.process_tts.assert_any_call("Hello!")
+    interaction_manager.tts_processor.process_tts.assert_any_call("How are you?")
 
 def test_event_registration(mock_config_path, mock_recording_service, mock_audio_device_manager, mock_openai):
     """Test event registration during initialization."""
@@ -354,3 +368,111 @@ def test_event_registration(mock_config_path, mock_recording_service, mock_audio
             SpeechEvent.NEW_TRANSCRIPTION,
             manager._handle_transcription
         )
+
+def test_tts_audio_queued_in_sentence_order(interaction_manager):
+    """Test that concurrently synthesized sentences are queued in order."""
+    import time
+
+    def slow_first(sentence):
+        if sentence == "First.":
+            time.sleep(0.05)
+        return sentence.encode()
+
+    interaction_manager.tts_processor.process_tts.side_effect = slow_first
+    interaction_manager.recording_service.manager = Mock(pipeline_state=None)
+    generation = interaction_manager.tts_generation
+
+    interaction_manager._submit_tts("First.", generation)
+    interaction_manager._submit_tts("Second.", generation)
+    interaction_manager._flush_tts(generation)
+
+    queued = [c.args[0] for c in interaction_manager.audio_processor.queue_audio.call_args_list]
+    assert queued == [b"First.", b"Second."]
+
+def test_cancelled_response_audio_is_discarded(interaction_manager):
+    """Test that audio from a response cancelled by a false end is never queued."""
+    interaction_manager.recording_service.manager = Mock(pipeline_state=None)
+    generation = interaction_manager.tts_generation
+
+    interaction_manager._handle_false_end()
+    interaction_manager._submit_tts("Stale.", generation)
+    interaction_manager._flush_tts(generation)
+
+    interaction_manager.audio_processor.queue_audio.assert_not_called()
+
+def test_llm_and_tts_share_http_client(mock_config_path, mock_recording_service, mock_audio_device_manager, mock_openai, config):
+    """Test that the LLM and TTS clients share one connection pool."""
+    with patch('services.interaction.manager.AudioProcessor'), \
+         patch('services.interaction.manager.TTSProcessor') as mock_tts_processor:
+        
+        manager = InteractionManager(
+            mock_config_path,
+            mock_recording_service,
+            mock_audio_device_manager
+        )
+        
+        mock_tts_processor.assert_called_once_with(config, http_client=manager.http_client)
+        assert mock_openai.call_args.kwargs["http_client"] is manager.http_client
+
+def test_commit_response_only_claims_once(interaction_manager):
+    """Test that a response is committed and parsed by only one handler."""
+    interaction_manager.messages_tentative = [{"role": "user", "content": "Hi"}]
+    
+    assert interaction_manager._commit_response() is True
+    assert interaction_manager.messages == [{"role": "user", "content": "Hi"}]
+    assert interaction_manager._commit_response() is False
+
+def test_add_message_commits_ahead_of_turn_in_progress(interaction_manager):
+    """Test that a message added outside a turn is kept once the turn is committed or rolled back."""
+    interaction_manager.messages = [{"role": "system", "content": "Initial message"}]
+    interaction_manager.messages_tentative = interaction_manager.messages + [{"role": "user", "content": "Hi"}]
+    intervention = {"role": "assistant", "content": "Back to work?"}
+    
+    interaction_manager.add_message(intervention)
+    
+    assert interaction_manager.messages == [{"role": "system", "content": "Initial message"}, intervention]
+    assert interaction_manager.messages_tentative[-1] == {"role": "user", "content": "Hi"}
+    interaction_manager._rollback_messages()
+    assert interaction_manager.messages_tentative == interaction_manager.messages
+
+def test_messages_tentative_is_rebuilt_only_after_changes(interaction_manager):
+    """Test that the tentative message list is reused until the conversation changes."""
+    interaction_manager.messages = [{"role": "system", "content": "Initial message"}]
+    
+    tentative = interaction_manager.messages_tentative
+    assert interaction_manager.messages_tentative is tentative
+    
+    interaction_manager.add_message({"role": "assistant", "content": "Hello"})
+    assert interaction_manager.messages_tentative is not tentative
+    assert len(interaction_manager.messages_tentative) == 2
+
+def test_parse_response_reuses_cached_mode_module(interaction_manager):
+    """Test that switching to a mode imports its module only once."""
+    interaction_manager.current_response = '{"outputs": {"next_mode": "test_mode", "activity_description": "Testing"}}'
+    mock_module = Mock()
+    
+    with patch('services.interaction.manager.import_module', return_value=mock_module) as mock_import, \
+         patch.object(interaction_manager, 'set_mode') as mock_set_mode, \
+         patch.dict(InteractionManager._MODE_CACHE, clear=True):
+        interaction_manager.parse_accumulated_response()
+        interaction_manager.parse_accumulated_response()
+        
+        mock_import.assert_called_once_with("modes.test_mode")
+        assert mock_set_mode.call_count == 2
+        mock_set_mode.assert_called_with(mock_module)
+
+def test_uncommitted_turn_is_rolled_back(interaction_manager, mock_openai):
+    """Test that a turn that was never committed is dropped by the next one."""
+    interaction_manager.messages = [{"role": "system", "content": "Initial message"}]
+    interaction_manager.recording_service.manager = Mock(pipeline_state=None)
+    mock_openai.return_value.chat.completions.create.side_effect = Exception("Test error")
+    
+    interaction_manager._handle_transcription([{"text": "First"}])
+    interaction_manager._handle_transcription([{"text": "Second"}])
+    
+    assert interaction_manager.messages_tentative == [
+        {"role": "system", "content": "Initial message"},
+        {"role": "user", "content": "Second"}
+    ]
+    assert interaction_manager._commit_response() is True
+    assert interaction_manager.messages == interaction_manager.messages_tentative
@@ -19,22 +19,36 @@
 import pytest
 from unittest.mock import Mock, patch
 from services.interaction.service import InteractionService
-from services.manage_recording import AudioRecordingService
 from services.event_system import SpeechEvent
 
-@pytest.fixture
+class _StubRecorder:
+    """Stands in for AudioRecordingService; the service only registers listeners on it."""
+    __slots__ = ('add_event_listener',)
+
+    def __init__(self):
+        self.add_event_listener = Mock()
+
+# The mocks are built once per module; reset_mocks clears their call
+# history before each test instead of rebuilding them
+@pytest.fixture(scope="module")
 def mock_audio_recording_service():
-    return Mock(spec=AudioRecordingService)
+    return _StubRecorder()
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_audio_device_manager():
     return Mock()
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_interaction_manager():
     with patch('services.interaction.service.InteractionManager') as mock:
         yield mock.return_value
 
+@pytest.fixture(autouse=True)
+def reset_mocks(mock_audio_recording_service, mock_audio_device_manager, mock_interaction_manager):
+    for mock in (mock_audio_recording_service.add_event_listener, mock_audio_device_manager,
+                 mock_interaction_manager):
+        mock.reset_mock()
+
 @pytest.fixture
 def interaction_service(mock_audio_recording_service, mock_audio_device_manager, mock_interaction_manager):
     return InteractionService(
@@ -76,14 +90,20 @@ def test_interaction_service_initialization_without_audio_device_manager():
     with pytest.raises(ValueError, match="AudioDeviceManager instance must be provided"):
         InteractionService(config_path="test_config.yaml", recording_service=Mock())
 
-def test_start_and_stop(interaction_service):
+@patch('services.interaction.service.threading.Thread')
+def test_start_and_stop(mock_thread, interaction_service):
+    thread_instance = mock_thread.return_value
+    thread_instance.is_alive.side_effect = [True, False]
+
     interaction_service.start()
     assert interaction_service.is_running == True
-    assert interaction_service.processing_thread is not None
+    assert interaction_service.processing_thread is thread_instance
     assert interaction_service.processing_thread.is_alive()
 
     interaction_service.stop()
     assert interaction_service.is_running == False
+    assert interaction_service._stop_event.is_set()
+    thread_instance.join.assert_called_once()
     assert not interaction_service.processing_thread.is_alive()
 
 def test_set_mode(interaction_service, mock_interaction_manager):
@@ -91,42 +111,33 @@ def test_set_mode(interaction_service, mock_interaction_manager):
     interaction_service.set_mode(test_mode)
     mock_interaction_manager.set_mode.assert_called_once_with(test_mode)
 
-def test_log_debug_enabled(interaction_service, capsys):
+@patch('builtins.print')
+def test_log_debug_enabled(mock_print, interaction_service):
     interaction_service._log("Test message")
-    captured = capsys.readouterr()
-    assert "[InteractionService] Test message" in captured.out
+    mock_print.assert_called_once_with("[InteractionService] Test message")
 
-def test_log_debug_disabled(interaction_service, capsys):
+@patch('builtins.print')
+def test_log_debug_disabled(mock_print, interaction_service):
     interaction_service.debug = False
     interaction_service._log("Test message")
-    captured = capsys.readouterr()
-    assert captured.out == ""
+    mock_print.assert_not_called()
 
-@patch('time.sleep')
-def test_process_loop(mock_sleep, interaction_service):
+def test_process_loop(interaction_service):
     interaction_service.is_running = True
-    
-    def stop_after_two_iterations(sleep_time):
-        nonlocal iteration_count
-        iteration_count += 1
-        if iteration_count >= 2:
-            interaction_service.is_running = False
-        assert sleep_time == 0.01
-
-    iteration_count = 0
-    mock_sleep.side_effect = stop_after_two_iterations
+    interaction_service._stop_event.set()
 
+    # Returns as soon as the stop event is set instead of polling
     interaction_service._process_loop()
 
-    assert mock_sleep.call_count == 2
-
-@patch('time.sleep', side_effect=Exception("Test exception"))
-def test_process_loop_exception_handling(mock_sleep, interaction_service):
+def test_process_loop_exception_handling(interaction_service):
     interaction_service.is_running = True
+    interaction_service._stop_event = Mock()
+    interaction_service._stop_event.wait.side_effect = Exception("Test exception")
     interaction_service._process_loop()
     assert interaction_service.is_running == False
 
-def test_start_when_already_running(interaction_service):
+@patch('services.interaction.service.threading.Thread')
+def test_start_when_already_running(mock_thread, interaction_service):
     interaction_service.start()
     assert interaction_service.is_running == True
     assert interaction_service.processing_thread is not None
@@ -137,6 +148,7 @@ def test_start_when_already_running(interaction_service):
     
     # Verify that a new thread wasn't created
     assert interaction_service.processing_thread == initial_thread
+    mock_thread.assert_called_once()
 
 def test_stop_when_not_running(interaction_service):
     assert interaction_service.is_running == False
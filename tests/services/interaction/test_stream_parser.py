@@ -0,0 +1,80 @@
+# This source code is a part of Attend. Attend is a voice assistant that uses 
+# very expensive algorithms to direct your attention... however you damn well please.
+# Copyright (C) 2025 Scott Macdonell
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import pytest
+from services.interaction.stream_parser import StreamParser
+
+@pytest.fixture
+def parser():
+    return StreamParser()
+
+def feed_all(parser, deltas):
+    sentences = []
+    for delta in deltas:
+        sentences.extend(parser.feed(delta))
+    return sentences
+
+def test_detects_response_type(parser):
+    """Test that the response type is found once its key has streamed in."""
+    assert feed_all(parser, ['{"outputs": {"next', '_mode": "perform_activity"}}']) == []
+    assert parser.response_type == "next_mode"
+    assert parser.assistant_response == ""
+
+def test_splits_assistant_response_into_sentences(parser):
+    """Test that sentences are returned as soon as each one is complete."""
+    assert parser.feed('{"outputs": {"assistant_response": "Hel') == []
+    assert parser.feed('lo. How') == ["Hello."]
+    assert parser.feed(' are you?') == []
+    assert parser.feed(' Fine') == ["How are you?"]
+    assert parser.feed('!"}}') == ["Fine!"]
+    assert parser.ended
+    assert parser.assistant_response == "Hello. How are you? Fine!"
+    assert parser.response == '{"outputs": {"assistant_response": "Hello. How are you? Fine!"}}'
+
+def test_handles_whole_response_in_one_delta(parser):
+    """Test that text in the same delta as the opening quote isn't lost."""
+    assert parser.feed('{"outputs": {"assistant_response": "Hi there. Bye."}}') == ["Hi there.", "Bye."]
+
+def test_close_flushes_unfinished_sentence(parser):
+    """Test that close returns text left when the stream ends early."""
+    feed_all(parser, ['{"outputs": {"assistant_response": "', 'One. Two'])
+    assert parser.close() == ["Two"]
+    assert parser.close() == []
+
+def test_split_sentences_keeps_closing_quotes(parser):
+    """Test that closing quotes and brackets stay with their sentence."""
+    assert parser.split_sentences("He said 'hi.' (Really!) Then") == ["He said 'hi.'", "(Really!)"]
+    assert parser.split_sentences(" left.", final=True) == ["Then left."]
+
+def test_abbreviation_split_across_deltas(parser):
+    """Test that a title's period doesn't end a sentence even when the name arrives later."""
+    assert parser.split_sentences("Ask Dr.") == []
+    assert parser.split_sentences(" Who. Then") == ["Ask Dr. Who."]
+    assert parser.close() == ["Then"]
+
+def test_finds_keys_split_across_deltas_with_padding(parser):
+    """Test that keys split across deltas are found however much whitespace pads them."""
+    deltas = ['{"out', 'puts"', ' ' * 100, ':', ' ' * 100, '{ "assistant_', 'response"', ' ' * 100, ': "Hi."}}']
+    assert feed_all(parser, deltas) == ["Hi."]
+    assert parser.response_type == "assistant_response"
+
+def test_decodes_escapes_split_across_deltas(parser):
+    """Test that escaped quotes don't end the text and escapes split across deltas are decoded."""
+    deltas = ['{"outputs": {"assistant_response": "Say \\', '"hi\\"', '. Caf\\u00', 'e9\\n', 'ok."}}']
+    assert feed_all(parser, deltas) == ['Say "hi".', 'Caf\u00e9\nok.']
+    assert parser.ended
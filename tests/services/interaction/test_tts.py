@@ -21,7 +21,9 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from services.interaction.tts import TTSProcessor
 
-@pytest.fixture
+# The config, OpenAI mock and processor are built once per module; reset_mocks
+# clears call history, side effects and debug mode before the next test
+@pytest.fixture(scope="module")
 def tts_config():
     return {
         "server-tts": {
@@ -33,12 +35,12 @@ def tts_config():
         }
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_openai():
     with patch('services.interaction.tts.OpenAI') as mock:
         # Setup streaming response mock
         mock_response = Mock()
-        mock_response.iter_bytes.return_value = [b"chunk1", b"chunk2"]
+        mock_response.read.return_value = b"chunk1chunk2"
         mock_response.__enter__ = Mock(return_value=mock_response)
         mock_response.__exit__ = Mock(return_value=None)
         
@@ -57,10 +59,17 @@ def mock_openai():
         mock.return_value = mock_client
         yield mock
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def tts_processor(tts_config, mock_openai):
     return TTSProcessor(tts_config)
 
+@pytest.fixture(autouse=True)
+def reset_mocks(mock_openai, tts_processor):
+    mock_openai.reset_mock()
+    # reset_mock() doesn't pass side_effect on to the client it returns
+    mock_openai.return_value.reset_mock(side_effect=True)
+    tts_processor.debug = False
+
 def test_init_creates_client_with_config(tts_config):
     """Test that initialization creates OpenAI client with correct configuration."""
     processor = TTSProcessor(tts_config)
@@ -68,25 +77,25 @@ def test_init_creates_client_with_config(tts_config):
     assert processor.config == tts_config
     assert processor.debug == False
 
-def test_log_prints_when_debug_enabled(tts_processor, capsys):
+@patch('builtins.print')
+def test_log_prints_when_debug_enabled(mock_print, tts_processor):
     """Test that _log prints messages when debug is enabled."""
     tts_processor.debug = True
     test_message = "test debug message"
     
     tts_processor._log(test_message)
-    captured = capsys.readouterr()
     
-    assert f"[TTSProcessor] {test_message}" in captured.out
+    mock_print.assert_called_once_with(f"[TTSProcessor] {test_message}")
 
-def test_log_silent_when_debug_disabled(tts_processor, capsys):
+@patch('builtins.print')
+def test_log_silent_when_debug_disabled(mock_print, tts_processor):
     """Test that _log doesn't print messages when debug is disabled."""
     tts_processor.debug = False
     test_message = "test debug message"
     
     tts_processor._log(test_message)
-    captured = capsys.readouterr()
     
-    assert captured.out == ""
+    mock_print.assert_not_called()
 
 def test_process_tts_success(tts_processor, tts_config, mock_openai):
     """Test successful TTS processing."""
@@ -135,3 +144,10 @@ def test_process_tts_with_special_characters(tts_processor, mock_openai):
         input=test_sentence
     )
     assert result == b"chunk1chunk2"
+
+def test_warm_up_synthesizes_and_discards(tts_processor, mock_openai):
+    """Test that warming up makes a single small TTS request."""
+    assert tts_processor.warm_up() is None
+    create = mock_openai.return_value.audio.speech.with_streaming_response.create
+    create.assert_called_once()
+    assert create.call_args.kwargs["input"] == "."
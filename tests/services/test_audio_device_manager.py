@@ -14,10 +14,10 @@
 
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
-
-import unittest
+import pytest
 from unittest.mock import Mock, patch, mock_open, MagicMock
 import sys
+import yaml
 
 # Create a mock pyaudio module
 mock_pyaudio = MagicMock()
@@ -25,7 +25,6 @@ mock_pyaudio.paInt16 = 8
 mock_pyaudio.paFloat32 = 32
 sys.modules['pyaudio'] = mock_pyaudio
 
-import yaml
 from services.audio_device_manager import AudioDeviceManager
 
 # Mock configuration for testing
@@ -37,180 +36,172 @@ client:
         channels: 1
         chunk: 1024
 """
-
-class TestAudioDeviceManager(unittest.TestCase):
-    def setUp(self):
-        # Create a mock PyAudio instance
-        self.mock_pyaudio = Mock()
-        self.mock_stream = Mock()
-        
-        # Configure mock stream
-        self.mock_stream.is_active.return_value = True
-        self.mock_stream.stop_stream = Mock()
-        self.mock_stream.close = Mock()
-        
-        # Configure PyAudio mock to return our mock stream
-        self.mock_pyaudio.open.return_value = self.mock_stream
-        
-        # Mock device info
-        self.mock_device_info = {
-            'index': 0,
-            'name': 'Mock Device',
-            'maxInputChannels': 2,
-            'maxOutputChannels': 2,
-            'defaultSampleRate': 44100
-        }
-        self.mock_pyaudio.get_default_input_device_info.return_value = self.mock_device_info
-        self.mock_pyaudio.get_default_output_device_info.return_value = self.mock_device_info
-        self.mock_pyaudio.get_sample_size = Mock(return_value=2)
-        
-        # Mock the PyAudio class itself
-        self.pyaudio_patcher = patch('pyaudio.PyAudio', return_value=self.mock_pyaudio)
-        self.pyaudio_patcher.start()
-        
-        # Create manager instance with mock config
-        with patch('builtins.open', mock_open(read_data=MOCK_CONFIG)):
-            self.manager = AudioDeviceManager('mock_config.yaml')
-
-    def tearDown(self):
-        self.pyaudio_patcher.stop()
-
-    def test_initialization(self):
-        """Test proper initialization of AudioDeviceManager"""
-        self.assertIsNone(self.manager.input_stream)
-        self.assertIsNone(self.manager.output_stream)
-        self.assertEqual(self.manager._rate, 16000)
-        self.assertEqual(self.manager._channels, 1)
-        self.assertEqual(self.manager._chunk, 1024)
-
-    def test_initialize_streams(self):
-        """Test initialization of both input and output streams"""
-        input_stream, output_stream = self.manager.initialize_streams()
-        
-        # Verify streams were created
-        self.assertIsNotNone(input_stream)
-        self.assertIsNotNone(output_stream)
-        
-        # Verify PyAudio.open was called twice (once for each stream)
-        self.assertEqual(self.mock_pyaudio.open.call_count, 2)
-        
-        # Verify streams were stored in active_streams
-        self.assertIn('input', self.manager._active_streams)
-        self.assertIn('output', self.manager._active_streams)
-
-    def test_create_input_stream(self):
-        """Test creation of input stream with custom parameters"""
-        custom_format = mock_pyaudio.paFloat32
-        custom_channels = 2
-        custom_rate = 44100
-        custom_chunk = 2048
-        
-        stream = self.manager.create_input_stream(
-            format=custom_format,
-            channels=custom_channels,
-            rate=custom_rate,
-            chunk=custom_chunk
-        )
-        
-        # Verify stream was created with custom parameters
-        self.mock_pyaudio.open.assert_called_with(
-            format=custom_format,
-            channels=custom_channels,
-            rate=custom_rate,
-            input=True,
-            output=False,
-            frames_per_buffer=custom_chunk,
-            input_device_index=None
-        )
-        
-        self.assertIs(stream, self.mock_stream)
-        self.assertIn('input', self.manager._active_streams)
-
-    def test_create_output_stream(self):
-        """Test creation of output stream with custom parameters"""
-        custom_format = mock_pyaudio.paFloat32
-        custom_channels = 2
-        custom_rate = 44100
-        custom_chunk = 2048
-        
-        stream = self.manager.create_output_stream(
-            format=custom_format,
-            channels=custom_channels,
-            rate=custom_rate,
-            chunk=custom_chunk
-        )
-        
-        # Verify stream was created with custom parameters
-        self.mock_pyaudio.open.assert_called_with(
-            format=custom_format,
-            channels=custom_channels,
-            rate=custom_rate,
-            input=False,
-            output=True,
-            frames_per_buffer=custom_chunk,
-            output_device_index=None
-        )
-        
-        self.assertIs(stream, self.mock_stream)
-        self.assertIn('output', self.manager._active_streams)
-
-    def test_close_stream(self):
-        """Test closing a specific stream"""
-        # First create a stream
-        self.manager.create_input_stream()
-        
-        # Then close it
-        self.manager.close_stream('input')
-        
-        # Verify stream was properly closed
-        self.mock_stream.stop_stream.assert_called_once()
-        self.mock_stream.close.assert_called_once()
-        self.assertNotIn('input', self.manager._active_streams)
-        self.assertIsNone(self.manager.input_stream)
-
-    def test_close_all_streams(self):
-        """Test closing all active streams"""
-        # Create both input and output streams
-        self.manager.initialize_streams()
-        
-        # Close all streams
-        self.manager.close_all_streams()
-        
-        # Verify all streams were properly closed
-        self.assertEqual(self.mock_stream.stop_stream.call_count, 2)
-        self.assertEqual(self.mock_stream.close.call_count, 2)
-        self.assertEqual(len(self.manager._active_streams), 0)
-        self.assertIsNone(self.manager.input_stream)
-        self.assertIsNone(self.manager.output_stream)
-
-    def test_terminate(self):
-        """Test termination of PyAudio instance"""
-        # Create some streams first
-        self.manager.initialize_streams()
-        
-        # Terminate
-        self.manager.terminate()
-        
-        # Verify everything was properly cleaned up
-        self.mock_stream.stop_stream.assert_called()
-        self.mock_stream.close.assert_called()
-        self.mock_pyaudio.terminate.assert_called_once()
-        self.assertEqual(len(self.manager._active_streams), 0)
-
-    def test_get_default_device_info(self):
-        """Test getting default device information"""
-        input_info = self.manager.get_default_input_device_info()
-        output_info = self.manager.get_default_output_device_info()
-        
-        self.assertEqual(input_info, self.mock_device_info)
-        self.assertEqual(output_info, self.mock_device_info)
-
-    def test_get_sample_size(self):
-        """Test getting sample size for a format"""
-        size = self.manager.get_sample_size(mock_pyaudio.paInt16)
-        
-        self.mock_pyaudio.get_sample_size.assert_called_once_with(mock_pyaudio.paInt16)
-        self.assertEqual(size, 2)
-
-if __name__ == '__main__':
-    unittest.main()
+# Parsed once here; the manager fixture hands it to AudioDeviceManager
+# instead of re-parsing the YAML for every test
+_PARSED = yaml.safe_load(MOCK_CONFIG)
+
+MOCK_DEVICE_INFO = {
+    'index': 0,
+    'name': 'Mock Device',
+    'maxInputChannels': 2,
+    'maxOutputChannels': 2,
+    'defaultSampleRate': 44100
+}
+
+@pytest.fixture(scope="module")
+def mock_stream():
+    stream = Mock()
+    stream.is_active.return_value = True
+    return stream
+
+@pytest.fixture(scope="module")
+def mock_audio(mock_stream):
+    """Mock PyAudio instance that opens mock_stream and reports MOCK_DEVICE_INFO."""
+    audio = Mock()
+    audio.open.return_value = mock_stream
+    audio.get_default_input_device_info.return_value = MOCK_DEVICE_INFO
+    audio.get_default_output_device_info.return_value = MOCK_DEVICE_INFO
+    audio.get_sample_size.return_value = 2
+    return audio
+
+@pytest.fixture(scope="module", autouse=True)
+def patch_pyaudio(mock_audio):
+    with patch('pyaudio.PyAudio', return_value=mock_audio):
+        yield
+
+@pytest.fixture(autouse=True)
+def reset_mocks(mock_audio, mock_stream):
+    mock_audio.reset_mock()
+    mock_stream.reset_mock()
+    mock_stream.is_active.return_value = True
+
+@pytest.fixture
+def manager():
+    with patch('builtins.open', mock_open()), \
+         patch('yaml.load', return_value=_PARSED):
+        return AudioDeviceManager('mock_config.yaml')
+
+def test_initialization(manager):
+    """Test proper initialization of AudioDeviceManager"""
+    assert manager.input_stream is None
+    assert manager.output_stream is None
+    assert manager._rate == 16000
+    assert manager._channels == 1
+    assert manager._chunk == 1024
+
+def test_initialize_streams(manager, mock_audio):
+    """Test initialization of both input and output streams"""
+    input_stream, output_stream = manager.initialize_streams()
+
+    # Verify streams were created
+    assert input_stream is not None
+    assert output_stream is not None
+
+    # Verify PyAudio.open was called twice (once for each stream)
+    assert mock_audio.open.call_count == 2
+
+    # Verify streams were stored in active_streams
+    assert 'input' in manager._active_streams
+    assert 'output' in manager._active_streams
+
+def test_initialize_streams_inactive_output(manager, mock_stream):
+    """Test that an output stream that fails to start is reported at startup"""
+    mock_stream.is_active.return_value = False
+
+    with pytest.raises(RuntimeError, match="Audio output stream is not active"):
+        manager.initialize_streams()
+
+def test_input_callback_queues_chunks(manager, mock_audio):
+    """Test that chunks from the input stream callback are returned by read_input"""
+    manager.initialize_streams()
+    _, kwargs = mock_audio.open.call_args_list[0]
+    callback = kwargs['stream_callback']
+
+    assert callback(b'chunk1', 512, {}, 0) == (None, mock_pyaudio.paContinue)
+    callback(b'chunk2', 512, {}, 0)
+
+    assert manager.read_input(timeout=0) == b'chunk1'
+    assert manager.read_input(timeout=0) == b'chunk2'
+    assert manager.read_input(timeout=0) is None
+
+@pytest.mark.parametrize("direction, direction_kwargs", [
+    ("input", {"input": True, "output": False, "input_device_index": None}),
+    ("output", {"input": False, "output": True, "output_device_index": None}),
+])
+def test_create_stream(manager, mock_audio, mock_stream, direction, direction_kwargs):
+    """Test creation of an input or output stream with custom parameters"""
+    create_stream = getattr(manager, f"create_{direction}_stream")
+    stream = create_stream(
+        format=mock_pyaudio.paFloat32,
+        channels=2,
+        rate=44100,
+        chunk=2048
+    )
+
+    # Verify stream was created with custom parameters
+    mock_audio.open.assert_called_with(
+        format=mock_pyaudio.paFloat32,
+        channels=2,
+        rate=44100,
+        frames_per_buffer=2048,
+        **direction_kwargs
+    )
+
+    assert stream is mock_stream
+    assert direction in manager._active_streams
+
+@pytest.mark.parametrize("direction", ["input", "output"])
+def test_close_stream(manager, mock_stream, direction):
+    """Test closing a specific stream"""
+    # First create a stream
+    getattr(manager, f"create_{direction}_stream")()
+
+    # Then close it
+    manager.close_stream(direction)
+
+    # Verify stream was properly closed
+    mock_stream.stop_stream.assert_called_once()
+    mock_stream.close.assert_called_once()
+    assert direction not in manager._active_streams
+    assert getattr(manager, f"{direction}_stream") is None
+
+def test_close_all_streams(manager, mock_stream):
+    """Test closing all active streams"""
+    # Create both input and output streams
+    manager.initialize_streams()
+
+    # Close all streams
+    manager.close_all_streams()
+
+    # Verify all streams were properly closed
+    assert mock_stream.stop_stream.call_count == 2
+    assert mock_stream.close.call_count == 2
+    assert len(manager._active_streams) == 0
+    assert manager.input_stream is None
+    assert manager.output_stream is None
+
+def test_terminate(manager, mock_audio, mock_stream):
+    """Test termination of PyAudio instance"""
+    # Create some streams first
+    manager.initialize_streams()
+
+    # Terminate
+    manager.terminate()
+
+    # Verify everything was properly cleaned up
+    mock_stream.stop_stream.assert_called()
+    mock_stream.close.assert_called()
+    mock_audio.terminate.assert_called_once()
+    assert len(manager._active_streams) == 0
+
+def test_get_default_device_info(manager):
+    """Test getting default device information"""
+    assert manager.get_default_input_device_info() == MOCK_DEVICE_INFO
+    assert manager.get_default_output_device_info() == MOCK_DEVICE_INFO
+
+def test_get_sample_size(manager, mock_audio):
+    """Test getting sample size for a format"""
+    size = manager.get_sample_size(mock_pyaudio.paInt16)
+
+    mock_audio.get_sample_size.assert_called_once_with(mock_pyaudio.paInt16)
+    assert size == 2
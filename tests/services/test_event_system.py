@@ -23,18 +23,21 @@ from services.event_system import EventEmitter, SpeechEvent
 def emitter():
     return EventEmitter()
 
-def test_event_registration(emitter):
-    """Test that callbacks can be registered for events."""
-    called = False
-    
-    def callback():
-        nonlocal called
-        called = True
-    
-    emitter.on(SpeechEvent.SPEECH_STARTED, callback)
+@pytest.mark.parametrize("n_callbacks", [1, 2, 8, 64])
+def test_dispatch(emitter, n_callbacks):
+    """Test that every registered callback is called once per emit."""
+    call_counts = [0] * n_callbacks
+
+    def make_callback(i):
+        def callback():
+            call_counts[i] += 1
+        return callback
+
+    for i in range(n_callbacks):
+        emitter.on(SpeechEvent.SPEECH_STARTED, make_callback(i))
     emitter.emit(SpeechEvent.SPEECH_STARTED)
-    
-    assert called == True
+
+    assert call_counts == [1] * n_callbacks
 
 def test_event_removal(emitter):
     """Test that callbacks can be removed from events."""
@@ -50,24 +53,6 @@ def test_event_removal(emitter):
     
     assert called == False
 
-def test_multiple_callbacks(emitter):
-    """Test that multiple callbacks can be registered for the same event."""
-    call_count = 0
-    
-    def callback1():
-        nonlocal call_count
-        call_count += 1
-    
-    def callback2():
-        nonlocal call_count
-        call_count += 1
-    
-    emitter.on(SpeechEvent.SPEECH_STARTED, callback1)
-    emitter.on(SpeechEvent.SPEECH_STARTED, callback2)
-    emitter.emit(SpeechEvent.SPEECH_STARTED)
-    
-    assert call_count == 2
-
 def test_event_with_arguments(emitter):
     """Test that events can be emitted with arguments."""
     received_args = None
@@ -115,3 +100,38 @@ def test_multiple_events_independence(emitter):
     emitter.emit(SpeechEvent.SPEECH_ENDED)
     assert start_called == False
     assert end_called == True
+
+def test_callbacks_called_in_registration_order(emitter):
+    """Test that callbacks run in the order they were registered, once each."""
+    calls = []
+
+    def first():
+        calls.append("first")
+
+    def second():
+        calls.append("second")
+
+    emitter.on(SpeechEvent.SPEECH_STARTED, first)
+    emitter.on(SpeechEvent.SPEECH_STARTED, second)
+    emitter.on(SpeechEvent.SPEECH_STARTED, first)
+    emitter.emit(SpeechEvent.SPEECH_STARTED)
+
+    assert calls == ["first", "second"]
+
+def test_callback_removed_during_emit(emitter):
+    """Test that a callback can remove itself while the event is being dispatched."""
+    calls = []
+
+    def once():
+        calls.append("once")
+        emitter.off(SpeechEvent.SPEECH_STARTED, once)
+
+    def always():
+        calls.append("always")
+
+    emitter.on(SpeechEvent.SPEECH_STARTED, once)
+    emitter.on(SpeechEvent.SPEECH_STARTED, always)
+    emitter.emit(SpeechEvent.SPEECH_STARTED)
+    emitter.emit(SpeechEvent.SPEECH_STARTED)
+
+    assert calls == ["once", "always", "always"]
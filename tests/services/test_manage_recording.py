@@ -17,13 +17,15 @@
 
 import pytest
 import os
-from unittest.mock import Mock, patch, MagicMock, mock_open, PropertyMock
+import io
+import wave
+from unittest.mock import Mock, patch, MagicMock, mock_open
 import yaml
 import numpy as np
 import time
 import sys
 
-from services.manage_recording import RecordingManager, AudioRecordingService
+from services.manage_recording import RecordingManager, AudioRecordingService, PipelineState
 from services.event_system import SpeechEvent
 
 @pytest.fixture
@@ -32,7 +34,13 @@ def mock_audio_manager():
     manager = Mock()
     manager.input_stream = Mock()
     manager.input_stream.is_active.return_value = True
-    manager.input_stream.read.return_value = b'\x00' * 2048  # Mock audio data
+    # Mock audio data, one 512 frame chunk per read. Like the real callback stream,
+    # a read waits about one chunk period, so the recording thread doesn't spin and
+    # starve the VAD thread of the GIL
+    def read_input(timeout=None):
+        time.sleep(512 / 16000)
+        return b'\x00' * 1024
+    manager.read_input.side_effect = read_input
     manager.get_sample_size.return_value = 2
     return manager
 
@@ -128,23 +136,84 @@ def test_vad_state_machine(recording_manager, mock_vad):
     
     recording_manager.stop_recording()
 
+def test_state_machine_false_end(recording_manager):
+    """Test that speech resuming after a potential end marks the pipeline false."""
+    events_received = []
+    recording_manager.add_event_listener(SpeechEvent.FALSE_END,
+                                      lambda: events_received.append(SpeechEvent.FALSE_END))
+    recording_manager.speech_started = True
+
+    recording_manager._update_speech_state({'end': 0}, 10.0)
+    assert recording_manager.speech_end_potential
+    assert recording_manager.speech_end_time == 10.0
+    assert recording_manager.current_pipeline_id is not None
+
+    recording_manager._update_speech_state({'start': 0}, 10.2)
+    assert not recording_manager.speech_end_potential
+    assert recording_manager.speech_end_time is None
+    assert recording_manager.speech_started
+    assert recording_manager.pipeline_state == PipelineState.FALSE
+    assert events_received == [SpeechEvent.FALSE_END]
+
+def test_vad_queue_drops_oldest(recording_manager):
+    """Test that a full VAD queue drops its oldest chunk instead of growing."""
+    size = recording_manager._vad_queue.maxsize
+    for i in range(size + 2):
+        recording_manager._queue_for_vad((b'', float(i)))
+
+    assert recording_manager._vad_queue.qsize() == size
+    assert recording_manager.vad_dropped_chunks == 2
+    assert recording_manager._vad_queue.get_nowait() == (b'', 2.0)
+
+def test_vad_processing_long_chunk(recording_manager, mock_vad):
+    """Test that a chunk longer than configured is converted and scored in whole windows."""
+    vad_iterator = mock_vad[1]
+    recording_manager.is_recording = True
+    recording_manager._vad_queue.put((b'\x00' * 2048, time.time()))
+    recording_manager._vad_queue.put(None)
+
+    recording_manager._vad_processing()
+
+    assert recording_manager.is_recording
+    assert vad_iterator.call_count == 2
+    assert all(call.args[0].size == 512 for call in vad_iterator.call_args_list)
+
+def test_store_rows_splits_chunks(recording_manager):
+    """Test that chunks of another size are stored as whole ring rows, keeping the remainder."""
+    data = np.arange(1200, dtype=np.int16).tobytes()
+
+    left = recording_manager._store_rows(data, 5.0)
+
+    assert recording_manager._ring_written == 2
+    assert np.array_equal(recording_manager._ring[1], np.arange(512, 1024, dtype=np.int16))
+    assert recording_manager._ring_times[1] == 5.0
+    assert left == data[2048:]
+
 def test_save_speech(recording_manager, tmp_path, mock_audio_manager):
     """Test saving speech to WAV file."""
     recording_manager.speech_start_time = time.time() - 1
     recording_manager.speech_end_time = time.time()
     
-    with patch('wave.open') as mock_wave:
-        mock_wave_file = Mock()
-        mock_wave.return_value = mock_wave_file
-        
-        file_path = recording_manager.save_speech()
-        
-        assert mock_wave_file.setnchannels.called_with(recording_manager.channels)
-        assert mock_wave_file.setsampwidth.called_with(mock_audio_manager.get_sample_size())
-        assert mock_wave_file.setframerate.called_with(recording_manager.rate)
-        assert mock_wave_file.writeframes.called
-        assert mock_wave_file.close.called
-        assert file_path.endswith('.wav')
+    file_path = recording_manager.save_speech()
+    assert file_path.endswith('.wav')
+
+    with wave.open(file_path, 'rb') as wav_file:
+        assert wav_file.getnchannels() == recording_manager.channels
+        assert wav_file.getsampwidth() == mock_audio_manager.get_sample_size.return_value
+        assert wav_file.getframerate() == recording_manager.rate
+
+def test_save_speech_to_buffer(recording_manager):
+    """Test that in-memory speech is a complete WAV file."""
+    recording_manager.speech_start_time = time.time() - 1
+    recording_manager.speech_end_time = time.time()
+
+    buffer = recording_manager.save_speech_to_buffer()
+    buffer.seek(0)
+
+    with wave.open(buffer, 'rb') as wav_file:
+        assert wav_file.getnchannels() == recording_manager.channels
+        assert wav_file.getframerate() == recording_manager.rate
+        assert wav_file.getnframes() * wav_file.getsampwidth() == len(buffer.getvalue()) - 44
 
 def test_process_stt(recording_manager, tmp_path):
     """Test speech-to-text processing."""
@@ -152,21 +221,8 @@ def test_process_stt(recording_manager, tmp_path):
     test_file = tmp_path / "test.wav"
     test_file.write_bytes(b'dummy audio data')
     
-    # Create a mock transcript with proper structure
-    mock_transcript = MagicMock()
-    type(mock_transcript).text = PropertyMock(return_value="test transcription")
-    
-    # Create a mock transcriptions object with create method
-    mock_transcriptions = MagicMock()
-    mock_transcriptions.create.return_value = mock_transcript
-    
-    # Create a mock audio object with transcriptions attribute
-    mock_audio = MagicMock()
-    mock_audio.transcriptions = mock_transcriptions
-    
-    # Create a mock OpenAI client with audio attribute
     mock_client = MagicMock()
-    mock_client.audio = mock_audio
+    mock_client.audio.transcriptions.create.return_value.text = "test transcription"
     
     # Mock the OpenAI constructor at the correct import path
     with patch('services.manage_recording.OpenAI', return_value=mock_client) as mock_openai:
@@ -178,6 +234,64 @@ def test_process_stt(recording_manager, tmp_path):
         assert result == [{"start": 0, "end": 0, "text": "test transcription"}]
         assert recording_manager.latest_transcription == result
 
+def test_process_stt_from_buffer(recording_manager):
+    """Test that in-memory speech is sent to STT as WAV data without touching the disk."""
+    mock_client = MagicMock()
+    mock_client.audio.transcriptions.create.return_value.text = "test transcription"
+
+    with patch('services.manage_recording.OpenAI', return_value=mock_client):
+        result = recording_manager.process_stt(io.BytesIO(b'RIFF dummy audio data'))
+
+    _, kwargs = mock_client.audio.transcriptions.create.call_args
+    assert kwargs['file'] == ("speech.wav", b'RIFF dummy audio data', "audio/wav")
+    assert result == [{"start": 0, "end": 0, "text": "test transcription"}]
+
+def test_process_stt_reuses_client(recording_manager, tmp_path):
+    """Test that the STT client is created once and reused across transcriptions."""
+    test_file = tmp_path / "test.wav"
+    test_file.write_bytes(b'dummy audio data')
+
+    mock_client = MagicMock()
+    mock_client.audio.transcriptions.create.return_value.text = "test transcription"
+
+    with patch('services.manage_recording.OpenAI', return_value=mock_client) as mock_openai:
+        recording_manager.process_stt(str(test_file))
+        recording_manager.process_stt(str(test_file))
+
+        mock_openai.assert_called_once()
+        assert mock_client.audio.transcriptions.create.call_count == 2
+
+def test_process_stt_batch(recording_manager):
+    """Test that a batch is transcribed on one client and returned in input order."""
+    mock_client = MagicMock()
+    mock_client.audio.transcriptions.create.side_effect = lambda model, file: Mock(text=file[1].decode())
+    received = []
+    recording_manager.add_event_listener(SpeechEvent.NEW_TRANSCRIPTION, received.append)
+
+    audios = [io.BytesIO(f"utterance {i}".encode()) for i in range(6)]
+    with patch('services.manage_recording.OpenAI', return_value=mock_client) as mock_openai:
+        results = recording_manager.process_stt_batch(audios)
+
+    mock_openai.assert_called_once()
+    assert [result[0]["text"] for result in results] == [f"utterance {i}" for i in range(6)]
+    assert received == results
+    assert recording_manager.latest_transcription == results[-1]
+
+def test_process_stt_batch_failure(recording_manager):
+    """Test that a failed transcription yields None without dropping the rest of the batch."""
+    def create(model, file):
+        if file[1] == b"bad":
+            raise Exception("STT error")
+        return Mock(text="ok")
+
+    mock_client = MagicMock()
+    mock_client.audio.transcriptions.create.side_effect = create
+
+    with patch('services.manage_recording.OpenAI', return_value=mock_client):
+        results = recording_manager.process_stt_batch([io.BytesIO(b"good"), io.BytesIO(b"bad")])
+
+    assert results == [[{"start": 0, "end": 0, "text": "ok"}], None]
+
 def test_event_emission(recording_manager):
     """Test that speech events are properly emitted."""
     events_received = []
@@ -229,6 +343,22 @@ def test_recording_service_event_handling(recording_service):
     
     recording_service.stop()
 
+def test_recording_service_transcribes_on_end_potential(recording_service):
+    """Test that a potential end of speech has the STT thread save and transcribe speech."""
+    speech_audio = io.BytesIO(b'RIFF')
+    recording_service.manager.save_speech_to_buffer = Mock(return_value=speech_audio)
+    recording_service.manager.process_stt = Mock()
+
+    recording_service.start()
+    recording_service.manager.speech_end_potential = True
+    recording_service.manager.events.emit(SpeechEvent.SPEECH_END_POTENTIAL)
+    time.sleep(0.1)  # Allow the STT thread to run
+
+    recording_service.manager.save_speech_to_buffer.assert_called_once()
+    recording_service.manager.process_stt.assert_called_once_with(speech_audio)
+
+    recording_service.stop()
+
 def test_reset_state(recording_manager):
     """Test resetting the VAD state machine."""
     recording_manager.speech_start_time = time.time()
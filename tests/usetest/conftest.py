@@ -0,0 +1,28 @@
+# This source code is a part of Attend. Attend is a voice assistant that uses 
+# very expensive algorithms to direct your attention... however you damn well please.
+# Copyright (C) 2025 Scott Macdonell
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import pytest
+
+@pytest.fixture(scope="session")
+def shared_audio_manager():
+    """Audio device manager with its streams opened once for all live tests."""
+    # Imported here so collecting the unit tests never loads the real PyAudio,
+    # which they replace with a mock
+    from services.audio_device_manager import AudioDeviceManager
+    audio_manager = AudioDeviceManager("attend_config.yaml")
+    audio_manager.initialize_streams()
+    yield audio_manager
+    audio_manager.terminate()
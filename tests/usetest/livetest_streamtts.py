@@ -15,25 +15,32 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import functools
 import yaml
 import openai
 from functions.streamtts import stream_text, stream_streaming_text
 from services.audio_device_manager import AudioDeviceManager
 
+@functools.cache
 def get_llm_config():
-    """Load LLM configuration from attend_config.yaml"""
+    """Load LLM configuration from attend_config.yaml, parsed once per run"""
     with open("attend_config.yaml", "r") as config_file:
         config = yaml.safe_load(config_file)
     return config["server-text"]
 
-def create_streaming_response():
-    """Create a streaming chat completion response from the LLM server."""
+@functools.cache
+def get_llm_client():
+    """Return the LLM server client, created once so its connections are reused."""
     config = get_llm_config()
-    
-    client = openai.OpenAI(
+    return openai.OpenAI(
         api_key=config['key'],
         base_url=f"http://{config['host']}:{config['port']}/v1"
     )
+
+def create_streaming_response():
+    """Create a streaming chat completion response from the LLM server."""
+    config = get_llm_config()
+    client = get_llm_client()
     
     return client.chat.completions.create(
         model=config['model'],
@@ -44,40 +51,29 @@ def create_streaming_response():
         stream=True
     )
 
-def test_stream_text():
+def test_stream_text(shared_audio_manager):
     """Test streaming TTS audio for a simple sentence."""
-    # Initialize audio device manager with config
-    audio_manager = AudioDeviceManager("attend_config.yaml")
-    audio_manager.initialize_streams()
-    
-    try:
-        # Stream a test sentence
-        test_sentence = "The quick brown fox jumps over the lazy dog."
-        timing = stream_text(test_sentence, audio_manager)
-        print(f"TTS Timing: {timing}")
-        
-    finally:
-        # Clean up
-        audio_manager.terminate()
+    # Stream a test sentence
+    test_sentence = "The quick brown fox jumps over the lazy dog."
+    timing = stream_text(test_sentence, shared_audio_manager)
+    print(f"TTS Timing: {timing}")
 
-def test_stream_streaming_text():
+def test_stream_streaming_text(shared_audio_manager):
     """Test streaming TTS audio from a live chat completion response."""
-    # Initialize audio device manager with config
+    # Get streaming response from LLM server
+    streaming_response = create_streaming_response()
+    
+    # Stream the response through TTS
+    timing = stream_streaming_text(streaming_response, shared_audio_manager)
+    print(f"Streaming TTS Timing: {timing}")
+
+if __name__ == "__main__":
+    # Open the audio streams once and share them between both tests
     audio_manager = AudioDeviceManager("attend_config.yaml")
     audio_manager.initialize_streams()
-    
     try:
-        # Get streaming response from LLM server
-        streaming_response = create_streaming_response()
-        
-        # Stream the response through TTS
-        timing = stream_streaming_text(streaming_response, audio_manager)
-        print(f"Streaming TTS Timing: {timing}")
-        
+        test_stream_text(audio_manager)
+        test_stream_streaming_text(audio_manager)
     finally:
         # Clean up
         audio_manager.terminate()
-
-if __name__ == "__main__":
-    test_stream_text()
-    test_stream_streaming_text()